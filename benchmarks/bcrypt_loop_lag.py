@@ -0,0 +1,77 @@
+"""Event-loop lag while a burst of logins hashes passwords.
+
+A ticker coroutine sleeps TICK seconds in a loop and records how late it wakes
+up. The burst runs once with bcrypt called inline on the loop (the old
+behaviour) and once through the password hasher pool.
+
+    python -m benchmarks.bcrypt_loop_lag --logins 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from src.auth.hashing import PasswordHasherPool
+from src.auth.utils import generate_passwd_hash, verify_password
+
+TICK = 0.005
+
+
+async def measure_lag(burst) -> dict:
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    ticker_task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await burst()
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticker_task
+
+    lags.sort()
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "lag_p50_ms": round(statistics.median(lags) * 1000, 2),
+        "lag_p99_ms": round(lags[int(len(lags) * 0.99) - 1] * 1000, 2),
+        "lag_max_ms": round(lags[-1] * 1000, 2),
+    }
+
+
+async def main(logins: int, workers: int, kind: str) -> None:
+    stored_hash = generate_passwd_hash("password")
+
+    async def login_inline():
+        verify_password("password", stored_hash)
+
+    async def inline_burst():
+        await asyncio.gather(*(login_inline() for _ in range(logins)))
+
+    pool = PasswordHasherPool(kind=kind, workers=workers, max_queue=logins)
+
+    async def pooled_burst():
+        await asyncio.gather(
+            *(pool.run(verify_password, "password", stored_hash) for _ in range(logins))
+        )
+
+    # warm the pool up so worker start-up is not counted
+    await pool.run(verify_password, "password", stored_hash)
+
+    print("inline:", await measure_lag(inline_burst))
+    print(f"{kind} pool x{workers}:", await measure_lag(pooled_burst))
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--kind", choices=["process", "thread"], default="process")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.logins, args.workers, args.kind))
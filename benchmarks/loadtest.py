@@ -0,0 +1,323 @@
+"""End-to-end load test: seed Postgres, start uvicorn, drive the main flows.
+
+Needs a throwaway Postgres migrated to head (`alembic upgrade head`) and a
+Redis; `seed` truncates users, books and reviews. The other settings the app
+needs (JWT_SECRET, MAIL_*) are read from .env as usual.
+
+    python -m benchmarks.loadtest seed --database-url postgresql+asyncpg://... --users 1000 --books 50000 --reviews 200000
+    python -m benchmarks.loadtest run --database-url postgresql+asyncpg://... --concurrency 32 --duration 20 --output baseline.json
+    python -m benchmarks.loadtest compare baseline.json current.json --tolerance 0.10
+
+`run` starts its own uvicorn with SQL_PROFILING on, so every response carries
+a Server-Timing header the query counts are read from. Pass --url to test a
+server that is already running instead (query counts are then only reported
+if that server profiles too). `compare` exits 1 when a scenario got slower,
+lost throughput or issues more queries than the baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.auth.utils import generate_passwd_hash
+from src.books.ratings import reconcile_ratings
+
+API = "/api/v1"
+PASSWORD = "load-test-password"
+SCENARIOS = ["login", "list", "detail", "create", "review"]
+
+SEED = [
+    "TRUNCATE reviews, books, users CASCADE",
+    """
+    INSERT INTO users (uid, username, email, firstname, lastname, role, is_verified,
+                       password_hash, created_at, updated_at)
+    SELECT gen_random_uuid(), 'load' || i, 'load' || i || '@example.com', 'Load', 'Test',
+           'user', true, :password_hash, now() - i * interval '1 minute', now()
+    FROM generate_series(1, :users) AS i
+    """,
+    """
+    WITH u AS (SELECT uid, row_number() OVER () AS n FROM users)
+    INSERT INTO books (uid, title, author, publisher, published_date, page_count, language,
+                       user_uid, created_at, updated_at)
+    SELECT gen_random_uuid(), 'Book ' || i, 'Author ' || i % 500, 'Publisher ' || i % 50,
+           date '1950-01-01' + i % 27000, 100 + i % 900, (ARRAY['en', 'fr', 'de'])[1 + i % 3],
+           u.uid, now() - i * interval '1 second', now()
+    FROM generate_series(1, :books) AS i JOIN u ON u.n = 1 + i % :users
+    """,
+    """
+    WITH b AS (SELECT uid, row_number() OVER () AS n FROM books),
+         u AS (SELECT uid, row_number() OVER () AS n FROM users)
+    INSERT INTO reviews (uid, rating, review_text, user_uid, book_uid, created_at, updated_at)
+    SELECT gen_random_uuid(), i % 5, 'Review ' || i, u.uid, b.uid,
+           now() - i * interval '1 second', now()
+    FROM generate_series(1, :reviews) AS i
+    JOIN b ON b.n = 1 + i % :books
+    JOIN u ON u.n = 1 + i % :users
+    """,
+]
+
+QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries')
+
+
+async def seed(database_url: str, users: int, books: int, reviews: int) -> None:
+    engine = create_async_engine(database_url)
+    params = {
+        "users": users, "books": books, "reviews": reviews,
+        # every user shares one hash so seeding does not spend minutes in bcrypt
+        "password_hash": generate_passwd_hash(PASSWORD),
+    }
+
+    async with engine.begin() as conn:
+        for statement in SEED:
+            await conn.execute(text(statement), params)
+
+    await reconcile_ratings(sessionmaker(bind=engine, class_=AsyncSession), batch_size=5000)
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+
+    await engine.dispose()
+    print(f"seeded {users} users, {books} books, {reviews} reviews")
+
+
+async def _sample_uids(database_url: str, table: str, n: int = 1000) -> List[str]:
+    engine = create_async_engine(database_url)
+    async with engine.connect() as conn:
+        result = await conn.execute(text(f"SELECT uid FROM {table} TABLESAMPLE SYSTEM (10) LIMIT :n"), {"n": n})
+        uids = [str(uid) for uid in result.scalars()]
+        if not uids:
+            result = await conn.execute(text(f"SELECT uid FROM {table} LIMIT :n"), {"n": n})
+            uids = [str(uid) for uid in result.scalars()]
+    await engine.dispose()
+    return uids
+
+
+def start_server(database_url: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        SQL_PROFILING="true",
+        # every simulated client shares one address; measure throughput, not the limiter
+        RATE_LIMIT_ENABLED="false",
+        ACCESS_LOG_SAMPLE_RATE="0",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--no-access-log", "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(f"{API}/health/db")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not come up")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.queries: List[int] = []
+
+    def add(self, started: float, response: httpx.Response) -> None:
+        self.latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors += 1
+        match = QUERIES.search(response.headers.get("server-timing", ""))
+        if match:
+            self.queries.append(int(match.group(1)))
+
+    def summary(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "queries_per_request": round(sum(self.queries) / len(self.queries), 2) if self.queries else None,
+        }
+
+
+def scenario_calls(book_uids: List[str]) -> Dict[str, Callable[[httpx.AsyncClient, dict, int], Awaitable[httpx.Response]]]:
+    async def login(client, auth, worker):
+        return await client.post(f"{API}/auth/login", json={"email": auth["email"], "password": PASSWORD})
+
+    async def list_books(client, auth, worker):
+        return await client.get(f"{API}/books/", params={"limit": 20}, headers=auth["headers"])
+
+    async def detail(client, auth, worker):
+        return await client.get(f"{API}/books/{random.choice(book_uids)}", headers=auth["headers"])
+
+    async def create(client, auth, worker):
+        book = {
+            "title": f"Load test {worker}-{random.getrandbits(32)}", "author": "Load Test",
+            "publisher": "Bookly", "published_date": "2024-01-01", "page_count": 321, "language": "en",
+        }
+        return await client.post(f"{API}/books/", json=book, headers=auth["headers"])
+
+    async def review(client, auth, worker):
+        body = {"rating": random.randint(0, 4), "review_text": "load test review"}
+        return await client.post(f"{API}/reviews/book/{random.choice(book_uids)}", json=body, headers=auth["headers"])
+
+    return {"login": login, "list": list_books, "detail": detail, "create": create, "review": review}
+
+
+async def _login(client: httpx.AsyncClient, email: str) -> dict:
+    response = await client.post(f"{API}/auth/login", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return {"email": email, "headers": {"Authorization": f"Bearer {response.json()['access_token']}"}}
+
+
+async def drive(client: httpx.AsyncClient, call, sessions: List[dict], duration: float, warmup: float) -> dict:
+    recorder = Recorder()
+    loop = asyncio.get_running_loop()
+    measure_from = loop.time() + warmup
+    stop_at = measure_from + duration
+
+    async def worker(n: int, auth: dict):
+        while loop.time() < stop_at:
+            started = time.perf_counter()
+            response = await call(client, auth, n)
+            if loop.time() >= measure_from:
+                recorder.add(started, response)
+
+    await asyncio.gather(*(worker(n, auth) for n, auth in enumerate(sessions)))
+    return recorder.summary(duration)
+
+
+async def run(args) -> dict:
+    server = None
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.database_url, args.port, args.workers)
+
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+            await wait_until_up(client)
+            book_uids = await _sample_uids(args.database_url, "books")
+            sessions = [
+                await _login(client, f"load{1 + n % args.users}@example.com") for n in range(args.concurrency)
+            ]
+
+            calls = scenario_calls(book_uids)
+            results = {}
+            for name in args.scenarios:
+                results[name] = await drive(client, calls[name], sessions, args.duration, args.warmup)
+                print(name, results[name])
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    return {
+        "meta": {
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "workers": args.workers if args.url is None else None,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[str]:
+    """Human-readable regressions of `current` against `baseline`."""
+    regressions = []
+    for name, base in baseline["scenarios"].items():
+        now = current["scenarios"].get(name)
+        if now is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if now[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {base[metric]} -> {now[metric]}")
+        if now["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']} -> {now['rps']}")
+        if base["queries_per_request"] is not None and (now["queries_per_request"] or 0) > base["queries_per_request"]:
+            regressions.append(f"{name}: queries/request {base['queries_per_request']} -> {now['queries_per_request']}")
+        if now["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {now['errors']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_cmd = commands.add_parser("seed")
+    seed_cmd.add_argument("--database-url", required=True)
+    seed_cmd.add_argument("--users", type=int, default=1000)
+    seed_cmd.add_argument("--books", type=int, default=50_000)
+    seed_cmd.add_argument("--reviews", type=int, default=200_000)
+
+    run_cmd = commands.add_parser("run")
+    run_cmd.add_argument("--database-url", required=True)
+    run_cmd.add_argument("--url", help="use a running server instead of starting one")
+    run_cmd.add_argument("--port", type=int, default=8765)
+    run_cmd.add_argument("--workers", type=int, default=1)
+    run_cmd.add_argument("--users", type=int, default=1000, help="number of seeded users")
+    run_cmd.add_argument("--concurrency", type=int, default=32)
+    run_cmd.add_argument("--duration", type=float, default=20)
+    run_cmd.add_argument("--warmup", type=float, default=3)
+    run_cmd.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    run_cmd.add_argument("--output", default="benchmarks/results/latest.json")
+
+    compare_cmd = commands.add_parser("compare")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("current")
+    compare_cmd.add_argument("--tolerance", type=float, default=0.10)
+
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        asyncio.run(seed(args.database_url, args.users, args.books, args.reviews))
+    elif args.command == "run":
+        report = asyncio.run(run(args))
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
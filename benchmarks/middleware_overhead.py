@@ -0,0 +1,120 @@
+"""Per-request cost of the middleware stack on a tiny JSON endpoint.
+
+    bare        no middleware at all
+    basehttp    the previous stack: an @app.middleware("http") access logger
+                (BaseHTTPMiddleware) plus Starlette's TrustedHostMiddleware and
+                CORSMiddleware
+    asgi        the stack from src.middleware.register_middleware
+
+Requests are fed straight into the ASGI app with an in-memory receive/send, so
+the numbers cover routing, middleware and the endpoint only, not the server or
+the network. The access log is switched off in both stacks so the log
+handler's I/O is not measured either.
+
+    python -m benchmarks.middleware_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.trustedhost import TrustedHostMiddleware
+
+from src.config import Config
+from src.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+from src.middleware import register_middleware
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def bare_app() -> FastAPI:
+    return make_app()
+
+
+def basehttp_app() -> FastAPI:
+    app = make_app()
+
+    @app.middleware("http")
+    async def custom_logging(request: Request, call_next):
+        request_id = request.headers.get(Config.REQUEST_ID_HEADER) or uuid.uuid4().hex
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(request.method)
+        in_flight.inc()
+        start = time.perf_counter_ns()
+        try:
+            response = await call_next(request)
+        finally:
+            in_flight.dec()
+        route = getattr(request.scope.get("route"), "path", "<unmatched>")
+        HTTP_REQUEST_DURATION.labels(request.method, route, str(response.status_code)).observe(
+            (time.perf_counter_ns() - start) / 1e9
+        )
+        response.headers[Config.REQUEST_ID_HEADER] = request_id
+        return response
+
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"], allow_credentials=True)
+    app.add_middleware(TrustedHostMiddleware, allowed_hosts=["localhost", "127.0.0.1"])
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = make_app()
+    register_middleware(app)
+    return app
+
+
+def make_scope(origin: bool) -> dict:
+    headers = [(b"host", b"localhost:8000"), (b"user-agent", b"bench")]
+    if origin:
+        headers.append((b"origin", b"http://localhost:3000"))
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/ping", "raw_path": b"/ping", "root_path": "", "query_string": b"",
+        "headers": headers, "client": ("127.0.0.1", 50000), "server": ("localhost", 8000),
+    }
+
+
+async def run(app, requests: int, origin: bool) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    # the first call builds the middleware stack
+    await app(make_scope(origin), receive, send)
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(make_scope(origin), receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+def main(requests: int, origin: bool) -> None:
+    Config.ACCESS_LOG_ENABLED = False
+    Config.SQL_PROFILING = False
+
+    baseline = None
+    for name, factory in (("bare", bare_app), ("basehttp", basehttp_app), ("asgi", asgi_app)):
+        per_request = asyncio.run(run(factory(), requests, origin))
+        baseline = baseline or per_request
+        overhead = (per_request - baseline) * 1e6
+        print(f"{name:10} {per_request * 1e6:8.1f} us/request  {overhead:+8.1f} us middleware")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--no-origin", action="store_true", help="send requests without an Origin header")
+    args = parser.parse_args()
+
+    main(args.requests, not args.no_origin)
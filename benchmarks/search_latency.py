@@ -0,0 +1,90 @@
+"""Latency of GET /books/search against a large seeded catalog.
+
+Run against a throwaway database that has been migrated to head
+(`alembic upgrade head`):
+
+    python -m benchmarks.search_latency --database-url postgresql+asyncpg://... --books 1000000
+
+Seeding is skipped when the books table already holds enough rows.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.books.service import BookService
+
+WORDS = [
+    "shadow", "river", "empire", "garden", "winter", "silent", "crimson", "ocean",
+    "stone", "dream", "night", "fire", "glass", "iron", "storm", "forest", "city",
+    "mirror", "secret", "journey", "light", "ghost", "crown", "harbor", "summer",
+]
+
+SEED = text(
+    """
+    INSERT INTO books (uid, title, author, publisher, published_date, page_count, language,
+                       created_at, updated_at)
+    SELECT gen_random_uuid(),
+           initcap((CAST(:words AS text[]))[1 + (random() * 24)::int] || ' ' || (CAST(:words AS text[]))[1 + (random() * 24)::int]
+                   || ' ' || (CAST(:words AS text[]))[1 + (random() * 24)::int]),
+           'Author ' || (CAST(:words AS text[]))[1 + (random() * 24)::int] || ' ' || (i % 50000),
+           'Publisher ' || (i % 300),
+           date '1950-01-01' + (random() * 27000)::int,
+           50 + (random() * 900)::int,
+           (ARRAY['en', 'fr', 'de', 'es'])[1 + i % 4],
+           now() - i * interval '1 second', now()
+    FROM generate_series(1, :n) AS i
+    """
+)
+
+
+def queries(n: int) -> list:
+    picked = []
+    for _ in range(n):
+        a, b = random.sample(WORDS, 2)
+        picked.append(random.choice([a, f"{a} {b}", f'"{a} {b}"', a[:-1] + "x"]))  # last one is a typo
+    return picked
+
+
+async def main(database_url: str, books: int, runs: int) -> None:
+    engine = create_async_engine(database_url)
+
+    async with engine.begin() as conn:
+        existing = (await conn.execute(text("SELECT count(*) FROM books"))).scalar()
+        if existing < books:
+            await conn.execute(SEED, {"words": WORDS, "n": books - existing})
+            await conn.execute(text("ANALYZE books"))
+
+    service = BookService()
+    timings = []
+    async with AsyncSession(engine) as session:
+        for q in queries(runs):
+            start = time.perf_counter()
+            await service.search_books(session, q, limit=20)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    await engine.dispose()
+
+    timings.sort()
+    print({
+        "books": max(books, existing),
+        "runs": runs,
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+        "max_ms": round(timings[-1], 2),
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.database_url, args.books, args.runs))
@@ -0,0 +1,72 @@
+"""Throughput of the three ways a 1k-row book list can be turned into JSON.
+
+    validate+encode  what FastAPI does for a returned ORM list with a response_model
+    pydantic         model_validate(from_attributes) + model_dump_json, the default path
+    orjson           the FAST_SERIALIZATION path in src.serialization
+
+Rows are plain objects with the Book attributes, so no database is needed. All
+three emit the default list fieldset.
+
+    python -m benchmarks.serialization --rows 1000 --repeat 50
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+
+from src import serialization
+from src.books.schemas import BookListPageModel
+from src.config import Config
+
+
+def make_books(rows: int) -> list:
+    now = datetime.now()
+    return [
+        SimpleNamespace(
+            uid=uuid.uuid4(), title=f"Book {i}", author=f"Author {i % 97}", publisher="Bookly",
+            published_date=date(2000 + i % 25, 1 + i % 12, 1 + i % 28), page_count=100 + i,
+            language="en", review_count=i % 7, rating_sum=(i % 7) * 3,
+            rating_histogram={"3": i % 7}, created_at=now, updated_at=now,
+        )
+        for i in range(rows)
+    ]
+
+
+def validate_and_encode(books) -> bytes:
+    page = BookListPageModel.model_validate({"items": books, "next_cursor": None}, from_attributes=True)
+    return json.dumps(jsonable_encoder(page)).encode()
+
+
+def pydantic_dump(books) -> bytes:
+    Config.FAST_SERIALIZATION = False
+    return serialization.dump_books_page(books, None)
+
+
+def orjson_dump(books) -> bytes:
+    Config.FAST_SERIALIZATION = True
+    return serialization.dump_books_page(books, None)
+
+
+def main(rows: int, repeat: int) -> None:
+    books = make_books(rows)
+
+    for name, fn in (("validate+encode", validate_and_encode), ("pydantic", pydantic_dump), ("orjson", orjson_dump)):
+        fn(books)  # warm-up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn(books)
+        per_call = (time.perf_counter() - started) / repeat
+        print(f"{name:16} {per_call * 1000:8.2f} ms/page  {rows / per_call:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    main(args.rows, args.repeat)
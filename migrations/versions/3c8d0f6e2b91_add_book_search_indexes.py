@@ -0,0 +1,54 @@
+"""add book search indexes
+
+Revision ID: 3c8d0f6e2b91
+Revises: e1a93c5b7d24
+Create Date: 2026-10-18 12:25:08.551390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8d0f6e2b91'
+down_revision: Union[str, Sequence[str], None] = 'e1a93c5b7d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # 'simple' rather than a language config: the catalog is multilingual and
+    # titles/names should not be stemmed. Weights rank title over author over publisher.
+    op.execute(
+        """
+        ALTER TABLE books ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(author, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(publisher, '')), 'C')
+        ) STORED
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_books_search_vector', 'books', ['search_vector'],
+            postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True,
+        )
+        # typo tolerance; the expression must match BookService.search_books
+        op.create_index(
+            'ix_books_title_author_trgm', 'books',
+            [sa.text("(title || ' ' || author) gin_trgm_ops")],
+            postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_title_author_trgm', table_name='books')
+    op.drop_index('ix_books_search_vector', table_name='books')
+    op.drop_column('books', 'search_vector')
@@ -0,0 +1,51 @@
+"""add hot lookup indexes
+
+Revision ID: 5f2c9e1d7a43
+Revises: 0cb3e53775d9
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2c9e1d7a43'
+down_revision: Union[str, Sequence[str], None] = '0cb3e53775d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, unique)
+INDEXES = [
+    ('ix_users_email', 'users', ['email'], True),
+    ('ix_books_created_at_uid', 'books', ['created_at', 'uid'], False),
+    ('ix_books_user_uid_created_at', 'books', ['user_uid', 'created_at'], False),
+    ('ix_reviews_book_uid_created_at', 'reviews', ['book_uid', 'created_at'], False),
+    ('ix_reviews_user_uid_created_at', 'reviews', ['user_uid', 'created_at'], False),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the tables writable while the indexes build, but it
+    # cannot run inside a transaction. The unique email index fails if duplicate
+    # emails already exist; clean those up first.
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(
+                name, table, columns, unique=unique,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True, if_exists=True,
+            )
@@ -0,0 +1,47 @@
+"""add book rating aggregates
+
+Revision ID: b7e4a2c91f08
+Revises: 5f2c9e1d7a43
+Create Date: 2026-10-18 11:02:17.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4a2c91f08'
+down_revision: Union[str, Sequence[str], None] = '5f2c9e1d7a43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing books start at zero; run the reconcile_book_ratings task once
+    # after upgrading to backfill them from the reviews table.
+    op.add_column('books', sa.Column('review_count', postgresql.INTEGER(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_sum', postgresql.INTEGER(), server_default='0', nullable=False))
+    op.add_column('books', sa.Column('rating_histogram', postgresql.JSONB(), server_default='{}', nullable=False))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_books_review_count_uid', 'books', ['review_count', 'uid'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_books_average_rating_uid', 'books',
+            [sa.text('coalesce(rating_sum::float8 / nullif(review_count, 0), 0)'), 'uid'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_average_rating_uid', table_name='books')
+    op.drop_index('ix_books_review_count_uid', table_name='books')
+    op.drop_column('books', 'rating_histogram')
+    op.drop_column('books', 'rating_sum')
+    op.drop_column('books', 'review_count')
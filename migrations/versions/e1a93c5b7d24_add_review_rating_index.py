@@ -0,0 +1,38 @@
+"""add review rating indexes
+
+Revision ID: e1a93c5b7d24
+Revises: b7e4a2c91f08
+Create Date: 2026-10-18 11:40:52.127733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a93c5b7d24'
+down_revision: Union[str, Sequence[str], None] = 'b7e4a2c91f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # back GET /reviews/book/{book_uid}?sort=rating and GET /reviews/user/{user_uid}?sort=rating
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_reviews_book_uid_rating_uid', 'reviews', ['book_uid', 'rating', 'uid'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_reviews_user_uid_rating_uid', 'reviews', ['user_uid', 'rating', 'uid'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_user_uid_rating_uid', table_name='reviews')
+    op.drop_index('ix_reviews_book_uid_rating_uid', table_name='reviews')
@@ -1,4 +1,7 @@
-from fastapi import FastAPI, status
+import hmac
+
+from fastapi import Depends, FastAPI, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from src.books.routes import router as books_router
 from src.auth.routes import auth_router
@@ -6,7 +9,10 @@ from src.middleware import register_middleware
 from src.reviews.routes import review_router
 
 from contextlib import asynccontextmanager
-from src.db.main import init_db
+from src.auth.dependencies import RoleChecker
+from src.db.main import init_db, pool_stats, primary_is_up
+from src.config import Config
+from src.metrics import render_metrics
 from src.errors import (
     create_exception_handler,
     InvalidToken,
@@ -69,6 +75,40 @@ register_middleware(app)
 #         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
 #     )
 
+
+@app.get(f"/api/{version}/health/db", include_in_schema=False)
+async def db_health():
+    if not await primary_is_up():
+        return JSONResponse(content={"status": "down"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "up"}
+
+
+@app.get(f"/api/{version}/health/db/pools", include_in_schema=False, dependencies=[Depends(RoleChecker(["admin"]))])
+async def db_pool_health():
+    return pool_stats()
+
+
+def _metrics_allowed(request: Request) -> bool:
+    if Config.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), Config.METRICS_TOKEN.encode()):
+            return True
+
+    allowed_ips = {ip.strip() for ip in Config.METRICS_ALLOWED_IPS.split(",") if ip.strip()}
+    return request.client is not None and request.client.host in allowed_ips
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    # route latencies and pool internals are for our scrapers only; look like nothing is here
+    if not _metrics_allowed(request):
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+
+    # in multiprocess mode this reads every worker's files, so keep it off the loop
+    body, content_type = await run_in_threadpool(render_metrics)
+    return Response(content=body, media_type=content_type)
+
+
 app.include_router(books_router, prefix=f"/api/{version}/books", tags=["books"])
 app.include_router(auth_router, prefix=f"/api/{version}/auth", tags=["auth"])
 app.include_router(review_router, prefix=f"/api/{version}/reviews", tags=["reviews"])
@@ -0,0 +1,48 @@
+import uuid
+from typing import Optional
+
+from src.auth.schemas import UserPrincipal
+from src.cache import TTLCache
+from src.config import Config
+from src.db.redis import redis_client
+
+
+class UserPrincipalCache:
+    """Two-tier cache of authenticated users keyed by uid.
+
+    Each worker keeps a short-lived LRU in front of a shared Redis copy. Writes
+    go through `invalidate`, which drops the Redis copy and this worker's copy;
+    other workers catch up within USER_CACHE_LOCAL_TTL seconds.
+    """
+
+    def __init__(self) -> None:
+        self.local = TTLCache(maxsize=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_LOCAL_TTL)
+
+    def _key(self, user_uid) -> str:
+        return f"user_principal:{user_uid}"
+
+    async def get(self, user_uid: str) -> Optional[UserPrincipal]:
+        principal = self.local.get(str(user_uid))
+        if principal is not None:
+            return principal
+
+        raw = await redis_client.get(self._key(user_uid))
+        if raw is None:
+            return None
+
+        principal = UserPrincipal.model_validate_json(raw)
+        self.local.set(str(user_uid), principal)
+        return principal
+
+    async def set(self, principal: UserPrincipal) -> None:
+        self.local.set(str(principal.uid), principal)
+        await redis_client.set(
+            self._key(principal.uid), principal.model_dump_json(), ex=Config.USER_CACHE_TTL
+        )
+
+    async def invalidate(self, user_uid: uuid.UUID) -> None:
+        self.local.pop(str(user_uid))
+        await redis_client.delete(self._key(user_uid))
+
+
+user_principal_cache = UserPrincipalCache()
@@ -2,7 +2,8 @@ from typing import List
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.db.models import User
+from src.auth.cache import user_principal_cache
+from src.auth.schemas import UserPrincipal
 from src.auth.service import UserService
 from src.db.main import get_session
 from src.db.redis import token_in_blocklist
@@ -12,7 +13,7 @@ from src.errors import (
     InvalidToken,
 )
 
-from .utils import decode_token
+from .utils import get_token_claims
 
 user_service = UserService()
 
@@ -25,13 +26,11 @@ class TokenBearer(HTTPBearer):
         creds = await super().__call__(request)
         token = creds.credentials
 
-        if not self.token_valid(token):
+        # decoded and signature-checked once per token, then served from memory
+        token_data = get_token_claims(token)
+        if token_data is None:
             raise InvalidToken()
 
-        token_data = decode_token(token)
-        # if token_data['refresh']:
-        #     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="please provide and access token")
-
         if await token_in_blocklist(token_data["jti"]):
             raise InvalidToken()
             # raise InvalidToken(status_code=status.HTTP_403_FORBIDDEN, detail={
@@ -45,10 +44,6 @@ class TokenBearer(HTTPBearer):
     def verify_token_data(self, token_data):
         raise NotImplementedError("Please Override this method in chiled classes")
 
-    def token_valid(self, token: str) -> bool:
-        token_data = decode_token(token)
-        return True if token_data is not None else False
-
 
 class AccessTokenBearer(TokenBearer):
     def verify_token_data(self, token_data: dict) -> None:
@@ -68,22 +63,39 @@ class RefreshTokenBearer(TokenBearer):
             )
 
 
+# Shared so FastAPI's per-request dependency cache resolves the token only once
+access_token_bearer = AccessTokenBearer()
+
+
 async def get_current_user(
-    token_details: dict = Depends(AccessTokenBearer()),
+    request: Request,
+    token_details: dict = Depends(access_token_bearer),
     session: AsyncSession = Depends(get_session),
-):
-    user_email = token_details["user"]["email"]
+) -> UserPrincipal | None:
+    principal = getattr(request.state, "user", None)
+    if principal is not None:
+        return principal
+
+    user_uid = token_details["user"]["user_uid"]
+
+    principal = await user_principal_cache.get(user_uid)
+    if principal is None:
+        user = await user_service.get_user_by_uid(user_uid, session)
+        if user is None:
+            raise InvalidToken()
 
-    user = await user_service.get_user_by_email(user_email, session)
+        principal = UserPrincipal.model_validate(user, from_attributes=True)
+        await user_principal_cache.set(principal)
 
-    return user
+    request.state.user = principal
+    return principal
 
 
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]) -> None:
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)):
+    def __call__(self, current_user: UserPrincipal = Depends(get_current_user)):
 
         if not current_user.is_verified:
             raise AccountNotVerifiedError()
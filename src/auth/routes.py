@@ -1,24 +1,26 @@
 from datetime import datetime, timedelta
+from typing import Optional
 import email
 import logging
 from tkinter import N
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, Header, HTTPException, status, BackgroundTasks
 from fastapi.responses import JSONResponse
-from src.celery_tasks import send_email
-from src import mail
 from src.auth.dependencies import (
-    AccessTokenBearer,
     RefreshTokenBearer,
     RoleChecker,
+    access_token_bearer,
     get_current_user,
 )
-from src.db.main import get_session
+from src.db.loading import USER_WITH_BOOKS_AND_REVIEWS
+from src.db.main import get_read_session, get_session
 from src.config import Config
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.db.redis import add_jti_to_blocklist
 from src.errors import AccessDeniedError
-from src.mail import create_message, mail
+from src.email_templates import preferred_locale
+from src.notifications import notification_service
+from src.rate_limit import RateLimit
 from .schemas import (
     EmailModel,
     PasswordResetConfirmModel,
@@ -28,14 +30,13 @@ from .schemas import (
     UserLoginModel,
     UserModel,
 )
+from .hashing import check_password, hash_password
 from .service import UserService
 from .utils import (
     create_access_token,
     create_url_safe_token,
     decode_token,
     decode_url_safe_token,
-    generate_passwd_hash,
-    verify_password,
 )
 
 auth_router = APIRouter()
@@ -44,10 +45,18 @@ role_checker = RoleChecker(["admin", "user"])
 
 REFRESH_TOKEN_EXPIRY = 2
 
+login_ip_limit = RateLimit("login:ip", Config.RATE_LIMIT_LOGIN_IP)
+login_account_limit = RateLimit("login:account", Config.RATE_LIMIT_LOGIN_ACCOUNT)
+signup_ip_limit = RateLimit("signup:ip", Config.RATE_LIMIT_SIGNUP_IP)
+password_reset_ip_limit = RateLimit("password-reset:ip", Config.RATE_LIMIT_PASSWORD_RESET_IP)
+password_reset_account_limit = RateLimit("password-reset:account", Config.RATE_LIMIT_PASSWORD_RESET_ACCOUNT)
+send_mail_ip_limit = RateLimit("send-mail:ip", Config.RATE_LIMIT_SEND_MAIL_IP)
 
-@auth_router.post("/signup", response_model=dict, status_code=status.HTTP_201_CREATED)
+
+@auth_router.post("/signup", response_model=dict, status_code=status.HTTP_201_CREATED, dependencies=[Depends(signup_ip_limit)])
 async def create_user_account(
-    user_data: UserCreateModel, bg_tasks: BackgroundTasks, session: AsyncSession = Depends(get_session)
+    user_data: UserCreateModel, bg_tasks: BackgroundTasks, session: AsyncSession = Depends(get_session),
+    accept_language: Optional[str] = Header(default=None),
 ):
     email = user_data.email
 
@@ -64,14 +73,10 @@ async def create_user_account(
     token = create_url_safe_token({"email": email})
     link = f"http://{Config.DOMAIN}/api/v1/auth/verify/{token}"
 
-    html_message = f"""
-    <h1>Verify your email</h1>
-    <p>Please click this <a href="{link}">link</a> to verify your email</p>
-    """
-
-    subject = "Verify your email"
-
-    send_email.delay([email], subject, html_message)
+    await notification_service.send_email(
+        "verify_email", [email], {"link": link},
+        locale=preferred_locale(accept_language), idempotency_key=str(new_user.uid),
+    )
 
     
 
@@ -110,17 +115,20 @@ async def verify_user_account(token: str, session: AsyncSession = Depends(get_se
     )
 
 
-@auth_router.post("/login")
+@auth_router.post("/login", dependencies=[Depends(login_ip_limit)])
 async def login_user(
     login_data: UserLoginModel, session: AsyncSession = Depends(get_session)
 ):
     email = login_data.email
     password = login_data.password
 
+    # before the user lookup and bcrypt, so a stuffing burst against one account costs nothing
+    await login_account_limit.hit(email.lower())
+
     user = await user_service.get_user_by_email(email, session)
 
     if user is not None:
-        password_valid = verify_password(password, user.password_hash)
+        password_valid = await check_password(password, user.password_hash)
 
         if password_valid:
             access_token = create_access_token(
@@ -169,13 +177,18 @@ async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer(
 
 @auth_router.get("/me", response_model=UserBooksModel)
 async def get_current_user(
-    user=Depends(get_current_user), _: bool = Depends(role_checker)
+    user=Depends(get_current_user),
+    _: bool = Depends(role_checker),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    return user
+    # the auth dependency only loads the bare user; books and reviews are loaded here
+    return await user_service.get_user_by_uid(
+        user.uid, session, load=USER_WITH_BOOKS_AND_REVIEWS
+    )
 
 
 @auth_router.get("/logout")
-async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
+async def revoke_token(token_details: dict = Depends(access_token_bearer)):
     jti = token_details["jti"]
 
     await add_jti_to_blocklist(jti)
@@ -185,17 +198,16 @@ async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
     )
 
 
-@auth_router.post("/send_mail")
-async def send_email_test(emails: EmailModel):
+@auth_router.post("/send_mail", dependencies=[Depends(send_mail_ip_limit)])
+async def send_email_test(emails: EmailModel, idempotency_key: Optional[str] = Header(default=None), accept_language: Optional[str] = Header(default=None)):
     try:
 
         emails = emails.addresses
         
-        html = "<h1>Welcome to bookly app</h1>"
-        message = create_message(emails, subject="Hello!, Welcome", body=html)
-        
-        await mail.send_message(message)
-        return {"message": "Email successfully sent!!!"}
+        await notification_service.send_email(
+            "welcome", emails, {}, locale=preferred_locale(accept_language), idempotency_key=idempotency_key
+        )
+        return {"message": "Email queued"}
     except Exception as e:
         logging.exception(e)
         return {"message": "failed to send mail"}
@@ -207,26 +219,20 @@ async def send_email_test(emails: EmailModel):
 3. Reset password -> password reset confirmation
 """
 
-@auth_router.post('/password-reset')
-async def password_reset(email_data: PasswordResetRequestModel):
+@auth_router.post('/password-reset', dependencies=[Depends(password_reset_ip_limit)])
+async def password_reset(email_data: PasswordResetRequestModel, idempotency_key: Optional[str] = Header(default=None), accept_language: Optional[str] = Header(default=None)):
     email = email_data.email
+    await password_reset_account_limit.hit(email.lower())
 
     token = create_url_safe_token({"email": email})
     link = f"http://{Config.DOMAIN}/api/v1/auth/password-reset-confirm/{token}"
 
-    html_message = f"""
-    <h1>Reset your password</h1>
-    <p>Please click this <a href="{link}">link</a> to reset your password</p>
-    """
-
-    message = create_message(
-        recipients=[email], subject="Reset your password", body=html_message
+    # without a client key, repeated requests for one address collapse into
+    # one email per NOTIFICATION_IDEMPOTENCY_TTL window
+    await notification_service.send_email(
+        "password_reset", [email], {"link": link}, locale=preferred_locale(accept_language),
+        idempotency_key=f"{email}:{idempotency_key}" if idempotency_key else email,
     )
-    await mail.send_message(message)
-
-    emails = [email]
-    subject = "Reset your password"
-    send_email.delay(emails, subject, html_message)
     # return new_user
     return JSONResponse(content= {
         "message": "Please check your email for instruction to reset your password"
@@ -240,7 +246,7 @@ async def reset_account_password(token: str, passwords: PasswordResetConfirmMode
     if passwords.new_password != passwords.confirm_password:
         raise HTTPException(detail="Passwords do not match", status_code = status.HTTP_400_BAD_REQUEST)
 
-    password_hash = generate_passwd_hash(passwords.new_password)
+    password_hash = await hash_password(passwords.new_password)
     if user_email:
         user = await user_service.get_user_by_email(user_email, session)
         if not user:
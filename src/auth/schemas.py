@@ -27,6 +27,18 @@ class UserModel(BaseModel):
     created_at: datetime 
     updated_at: datetime
 
+class UserPrincipal(BaseModel):
+    """The authenticated user as seen by permission checks; cached, so no password hash"""
+    uid: uuid.UUID
+    username: str
+    email: str
+    firstname: str
+    lastname: str
+    role: str
+    is_verified: bool
+    created_at: datetime
+    updated_at: datetime
+
 class UserBooksModel(UserModel):
     books: List[Book]
     reviews: List[ReviewModel]
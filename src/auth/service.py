@@ -1,17 +1,26 @@
+from src.auth.cache import user_principal_cache
 from src.auth.schemas import UserCreateModel
+from src.db.loading import NO_RELATIONSHIPS, LoadProfile, with_profile
 from src.db.models import User
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
-from .utils import generate_passwd_hash
+from .hashing import hash_password
 class UserService:
-    async def get_user_by_email(self, email: str, session: AsyncSession):
-        statement = select(User).where(User.email == email)
+    async def get_user_by_email(self, email: str, session: AsyncSession, load: LoadProfile = NO_RELATIONSHIPS):
+        statement = with_profile(select(User).where(User.email == email), load)
 
         result = await session.exec(statement)
 
         user = result.first()
         return user
     
+    async def get_user_by_uid(self, user_uid: str, session: AsyncSession, load: LoadProfile = NO_RELATIONSHIPS):
+        statement = with_profile(select(User).where(User.uid == user_uid), load)
+
+        result = await session.exec(statement)
+
+        return result.first()
+
     async def user_exists(self, email: str, session: AsyncSession):
         user = await self.get_user_by_email(email, session)
 
@@ -22,7 +31,7 @@ class UserService:
 
         new_user = User(**user_dict)
 
-        new_user.password_hash = generate_passwd_hash(user_dict['password'])
+        new_user.password_hash = await hash_password(user_dict['password'])
         new_user.role = "user"
         
         session.add(new_user)
@@ -36,4 +45,5 @@ class UserService:
             setattr(user, k, v)
         
         await session.commit()
+        await user_principal_cache.invalidate(user.uid)
         return user
\ No newline at end of file
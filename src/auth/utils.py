@@ -2,15 +2,20 @@ from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from itsdangerous import URLSafeTimedSerializer
 import jwt
+import time
 import uuid
 import logging
 
+from src.cache import TTLCache
 from src.config import Config
 
 passwrd_context = CryptContext(schemes=["bcrypt"])
 
 ACCESS_TOKEN_EXPIRY = 3600
 
+# Verified claims keyed by token signature, each kept for the token's remaining lifetime
+verified_claims = TTLCache(maxsize=Config.TOKEN_CACHE_SIZE, ttl=Config.TOKEN_CACHE_TTL)
+
 
 def generate_passwd_hash(password: str) -> str:
     hash = passwrd_context.hash(password)
@@ -59,6 +64,24 @@ def decode_token(token: str) -> dict:
     except:
         return None
 
+def get_token_claims(token: str) -> dict:
+    """Decode and verify a JWT, reusing the result for repeat presentations of the same token."""
+    signature = token.rpartition(".")[2]
+
+    cached = verified_claims.get(signature)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+
+    token_data = decode_token(token)
+    if token_data is None:
+        return None
+
+    remaining = token_data["exp"] - time.time()
+    if remaining > 0:
+        verified_claims.set(signature, (token, token_data), ttl=remaining)
+
+    return token_data
+
 serializer = URLSafeTimedSerializer(
     secret_key=Config.JWT_SECRET,
     salt="email-configuration"
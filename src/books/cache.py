@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from src.config import Config
+from src.db.redis import redis_client, worker_redis
+from src.metrics import BOOK_CACHE_ERRORS, BOOK_CACHE_LOCK_WAITS, BOOK_CACHE_LOOKUPS
+
+LIST_VERSION_KEY = "books:cache:list:version"
+
+# Reads the version counter and the entry stored under it in one round trip
+GET_VERSIONED = redis_client.register_script(
+    """
+    local version = redis.call('GET', KEYS[1]) or '0'
+    return {version, redis.call('GET', ARGV[1] .. ':v' .. version)}
+    """
+)
+
+
+def book_version_key(book_uid) -> str:
+    return f"books:cache:version:{book_uid}"
+
+
+@dataclass
+class CachedResponse:
+    etag: str
+    last_modified: Optional[datetime]
+    body: bytes
+
+    def dumps(self) -> bytes:
+        last_modified = self.last_modified.isoformat() if self.last_modified else ""
+        return f"{self.etag}\n{last_modified}\n".encode() + self.body
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "CachedResponse":
+        etag, last_modified, body = raw.split(b"\n", 2)
+        return cls(
+            etag=etag.decode(),
+            last_modified=datetime.fromisoformat(last_modified.decode()) if last_modified else None,
+            body=body,
+        )
+
+
+class BookResponseCache:
+    """Serialised book responses in Redis, versioned so writes never race a refill.
+
+    Every entry key carries a version counter. Writers bump the counter after
+    they commit, and readers always look up the current version, so a refill
+    computed from pre-commit data lands under a version nobody reads again.
+    That only holds if `render` reads from the primary: a lagging replica could
+    still return the old row after the bump, and it would then be cached under
+    the new version until BOOKS_RESPONSE_CACHE_TTL.
+    Misses are single-flighted: in-process through a shared future, across
+    workers through a short Redis lock that other workers wait on.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get(self, key: str, version_key: str) -> Tuple[str, Optional[CachedResponse]]:
+        """Return the current version and the entry stored under it, if any."""
+        if not Config.BOOKS_RESPONSE_CACHE_ENABLED:
+            return "0", None
+
+        try:
+            version, raw = await GET_VERSIONED(keys=[version_key], args=[key])
+        except Exception as e:
+            BOOK_CACHE_ERRORS.inc()
+            logging.exception(e)
+            return "0", None
+
+        version = version.decode() if isinstance(version, bytes) else str(version)
+        if raw is None:
+            BOOK_CACHE_LOOKUPS.labels("miss").inc()
+            return version, None
+
+        BOOK_CACHE_LOOKUPS.labels("hit").inc()
+        return version, CachedResponse.loads(raw)
+
+    async def fill(
+        self,
+        key: str,
+        version: str,
+        render: Callable[[], Awaitable[Optional[CachedResponse]]],
+    ) -> Optional[CachedResponse]:
+        """Compute a missing entry once and store it under the version read by `get`."""
+        if not Config.BOOKS_RESPONSE_CACHE_ENABLED:
+            return await render()
+
+        versioned_key = f"{key}:v{version}"
+        pending = self._inflight.get(versioned_key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[versioned_key] = future
+        try:
+            entry = await self._fill(versioned_key, render)
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # marks it retrieved when nobody else was waiting
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[versioned_key]
+
+    async def _fill(self, versioned_key: str, render) -> Optional[CachedResponse]:
+        lock_key = f"{versioned_key}:lock"
+        token = uuid.uuid4().hex
+        lock_ttl = Config.BOOKS_RESPONSE_CACHE_LOCK_TTL
+
+        try:
+            acquired = await redis_client.set(lock_key, token, nx=True, px=lock_ttl)
+        except Exception as e:
+            BOOK_CACHE_ERRORS.inc()
+            logging.exception(e)
+            return await render()
+
+        if not acquired:
+            # another worker is rendering this entry; wait for it rather than pile onto Postgres
+            BOOK_CACHE_LOCK_WAITS.inc()
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + lock_ttl / 1000
+            while loop.time() < deadline:
+                await asyncio.sleep(0.05)
+                raw = await redis_client.get(versioned_key)
+                if raw is not None:
+                    return CachedResponse.loads(raw)
+            return await render()
+
+        try:
+            entry = await render()
+            if entry is not None:
+                await redis_client.set(versioned_key, entry.dumps(), ex=Config.BOOKS_RESPONSE_CACHE_TTL)
+            return entry
+        finally:
+            if await redis_client.get(lock_key) == token.encode():
+                await redis_client.delete(lock_key)
+
+    async def invalidate(self, book_uid=None) -> None:
+        """Retire cached list pages and, when given, one book's detail entries.
+
+        Call after the write has committed.
+        """
+        if not Config.BOOKS_RESPONSE_CACHE_ENABLED:
+            return
+
+        keys = [LIST_VERSION_KEY] + ([book_version_key(book_uid)] if book_uid else [])
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for version_key in keys:
+                    pipe.incr(version_key)
+                    pipe.expire(version_key, Config.BOOKS_RESPONSE_CACHE_VERSION_TTL)
+                await pipe.execute()
+        except Exception as e:
+            # entries still expire after BOOKS_RESPONSE_CACHE_TTL
+            BOOK_CACHE_ERRORS.inc()
+            logging.exception(e)
+
+
+def invalidate_from_worker(book_uids: Iterable = ()) -> None:
+    """BookResponseCache.invalidate for Celery tasks: retire list pages and the given books."""
+    if not Config.BOOKS_RESPONSE_CACHE_ENABLED:
+        return
+
+    keys = [LIST_VERSION_KEY] + [book_version_key(uid) for uid in book_uids]
+    try:
+        with worker_redis().pipeline(transaction=False) as pipe:
+            for version_key in keys:
+                pipe.incr(version_key)
+                pipe.expire(version_key, Config.BOOKS_RESPONSE_CACHE_VERSION_TTL)
+            pipe.execute()
+    except Exception as e:
+        BOOK_CACHE_ERRORS.inc()
+        logging.exception(e)
+
+
+book_response_cache = BookResponseCache()
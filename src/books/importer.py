@@ -0,0 +1,200 @@
+import codecs
+import csv
+import json
+import uuid
+from datetime import date, datetime
+from typing import AsyncIterator, Iterable, List, Tuple
+
+from pydantic import ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.main import worker_session
+from .schemas import BookCreateModel
+
+# Column order of the records handed to COPY
+COPY_COLUMNS = [
+    "uid", "title", "author", "publisher", "published_date", "page_count",
+    "language", "user_uid", "created_at", "updated_at",
+]
+
+Row = Tuple[int, dict]
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into text lines without holding more than one chunk."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Row]:
+    line_no = 0
+    async for line in _lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_no, {"__error__": f"invalid JSON: {e}"}
+            continue
+
+        if not isinstance(data, dict):
+            yield line_no, {"__error__": "expected a JSON object"}
+            continue
+
+        yield line_no, data
+
+
+async def parse_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Row]:
+    header = None
+    record = ""
+    line_no = 0
+
+    async for line in _lines(chunks):
+        line_no += 1
+        record += line
+        # a quoted field may span lines; the record is complete once its quotes balance
+        if record.count('"') % 2:
+            continue
+
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not values:
+            continue
+
+        if header is None:
+            header = [column.strip() for column in values]
+            continue
+
+        yield line_no, dict(zip(header, values))
+
+
+async def _batches(rows: AsyncIterator[Row], size: int) -> AsyncIterator[List[Row]]:
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+class BookImportReport:
+    def __init__(self) -> None:
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.errors_truncated = False
+
+    def add_error(self, line: int, messages: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < Config.BOOK_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "errors": messages})
+        else:
+            self.errors_truncated = True
+
+    def merge(self, other: dict) -> None:
+        self.inserted += other["inserted"]
+        self.failed += other["failed"]
+        room = Config.BOOK_IMPORT_MAX_ERRORS - len(self.errors)
+        self.errors.extend(other["errors"][:room])
+        self.errors_truncated = (
+            self.errors_truncated or other["errors_truncated"] or len(other["errors"]) > room
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.errors_truncated,
+        }
+
+
+class BookImporter:
+    def _to_records(self, batch: Iterable[Row], user_uid: uuid.UUID, report: BookImportReport):
+        """Validate a batch against BookCreateModel and build COPY records for the good rows."""
+        records, lines = [], []
+        now = datetime.now()
+
+        for line, data in batch:
+            if not isinstance(data, dict):
+                # job-mode chunks come back from the broker, so check again here
+                report.add_error(line, ["expected a JSON object"])
+                continue
+            if "__error__" in data:
+                report.add_error(line, [data["__error__"]])
+                continue
+            try:
+                book = BookCreateModel.model_validate(data)
+                published_date = date.fromisoformat(book.published_date)
+            except ValidationError as e:
+                report.add_error(line, [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()])
+                continue
+            except ValueError:
+                report.add_error(line, ["published_date: expected YYYY-MM-DD"])
+                continue
+
+            records.append((
+                uuid.uuid4(), book.title, book.author, book.publisher, published_date,
+                book.page_count, book.language, user_uid, now, now,
+            ))
+            lines.append(line)
+
+        return records, lines
+
+    async def _copy(self, records: list, session: AsyncSession) -> None:
+        conn = await session.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "books", records=records, columns=COPY_COLUMNS
+        )
+
+    async def import_rows(self, rows: AsyncIterator[Row], user_uid: str, session_factory) -> BookImportReport:
+        """Load rows in batches of BOOK_IMPORT_BATCH_SIZE, one transaction per batch."""
+        report = BookImportReport()
+        user_uid = uuid.UUID(str(user_uid))
+
+        async for batch in _batches(rows, Config.BOOK_IMPORT_BATCH_SIZE):
+            records, lines = self._to_records(batch, user_uid, report)
+            if not records:
+                continue
+
+            async with session_factory() as session:
+                try:
+                    await self._copy(records, session)
+                    await session.commit()
+                    report.inserted += len(records)
+                except Exception as e:
+                    await session.rollback()
+                    for line in lines:
+                        report.add_error(line, [f"batch rejected by the database: {e.__class__.__name__}"])
+
+        return report
+
+
+async def _iterate(rows: List[Row]) -> AsyncIterator[Row]:
+    for row in rows:
+        yield row
+
+
+async def import_chunk(rows: List[list], user_uid: str) -> dict:
+    """Import one chunk of (line, row) pairs queued by an async import job."""
+    report = await BookImporter().import_rows(
+        _iterate([(line, data) for line, data in rows]), user_uid, worker_session
+    )
+
+    return report.as_dict()
@@ -0,0 +1,117 @@
+import uuid
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import Float, cast, func, literal, literal_column, text, update
+from sqlalchemy.dialects import postgresql as pg
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.models import Book
+
+# Must stay identical to the ix_books_average_rating_uid expression so the sort can use it.
+# The zeros are inlined: as bind parameters the planner can't match the prepared statement to the index.
+ZERO = literal_column("0")
+average_rating = func.coalesce(
+    cast(Book.rating_sum, Float) / func.nullif(Book.review_count, ZERO), ZERO
+)
+
+# sort name -> (key expression, cursor type, key of a loaded Book)
+BOOK_SORTS = {
+    "recent": (Book.created_at, datetime.fromisoformat, lambda b: b.created_at),
+    "rating": (
+        average_rating,
+        float,
+        lambda b: b.rating_sum / b.review_count if b.review_count else 0.0,
+    ),
+    "reviews": (Book.review_count, int, lambda b: b.review_count),
+}
+
+# Columns a projected row needs for each sort's cursor key
+BOOK_SORT_COLUMNS = {
+    "recent": ("created_at",),
+    "rating": ("rating_sum", "review_count"),
+    "reviews": ("review_count",),
+}
+
+
+async def apply_review(book_uid: uuid.UUID, rating: int, session: AsyncSession) -> bool:
+    """Add one review to a book's aggregates inside the caller's transaction.
+
+    The increments happen in SQL, so concurrent reviews of the same book never
+    overwrite each other. Returns False when there is no such book.
+    """
+    key = str(rating)
+    statement = (
+        update(Book)
+        .where(Book.uid == book_uid)
+        .values(
+            # a new review changes the book's representation, so it counts as a modification
+            updated_at=datetime.now(),
+            review_count=Book.review_count + 1,
+            rating_sum=Book.rating_sum + rating,
+            rating_histogram=func.jsonb_set(
+                Book.rating_histogram,
+                literal([key], pg.ARRAY(pg.TEXT)),
+                func.to_jsonb(func.coalesce(cast(Book.rating_histogram[key].astext, pg.INTEGER), 0) + 1),
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    result = await session.execute(statement)
+    return result.rowcount > 0
+
+
+RECONCILE_BATCH = text(
+    """
+    WITH batch AS (
+        SELECT uid FROM books WHERE uid > :after ORDER BY uid LIMIT :limit
+    ),
+    per_rating AS (
+        SELECT r.book_uid, r.rating, count(*) AS n
+        FROM reviews r JOIN batch ON r.book_uid = batch.uid
+        GROUP BY r.book_uid, r.rating
+    ),
+    agg AS (
+        SELECT book_uid,
+               sum(n)::int AS review_count,
+               sum(rating * n)::int AS rating_sum,
+               jsonb_object_agg(rating::text, n) AS rating_histogram
+        FROM per_rating GROUP BY book_uid
+    )
+    UPDATE books
+    SET review_count = coalesce(agg.review_count, 0),
+        rating_sum = coalesce(agg.rating_sum, 0),
+        rating_histogram = coalesce(agg.rating_histogram, '{}'::jsonb)
+    FROM batch LEFT JOIN agg ON agg.book_uid = batch.uid
+    WHERE books.uid = batch.uid
+    RETURNING books.uid
+    """
+)
+
+
+async def reconcile_ratings(
+    session_factory,
+    batch_size: int,
+    on_batch: Optional[Callable[[List[uuid.UUID]], None]] = None,
+) -> int:
+    """Rebuild every book's aggregates from the reviews table, one batch per transaction.
+
+    `on_batch` is called with each committed batch's book uids.
+    """
+    after = uuid.UUID(int=0)
+    rebuilt = 0
+
+    while True:
+        async with session_factory() as session:
+            result = await session.execute(RECONCILE_BATCH, {"after": after, "limit": batch_size})
+            uids = result.scalars().all()
+            await session.commit()
+
+        if not uids:
+            return rebuilt
+
+        if on_batch is not None:
+            on_batch(uids)
+        rebuilt += len(uids)
+        after = max(uids)
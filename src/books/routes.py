@@ -1,32 +1,137 @@
 
-from typing import List
-from fastapi import APIRouter, HTTPException, status, Depends
+import uuid
+from datetime import date, datetime
+from typing import List, Literal, Optional, Tuple, Union
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
+from src.config import Config
 from src.db.models import Book
 from src.books.service import BookService
-from src.books.schemas import BookCreateModel, BookDetailModel, BookUpdateModel  # Assuming you have a book_data
-from src.db.main import get_session
-from src.auth.dependencies import AccessTokenBearer, RoleChecker
+from src.books.cache import LIST_VERSION_KEY, CachedResponse, book_response_cache, book_version_key
+from src.books.importer import BookImportReport, BookImporter, parse_csv, parse_ndjson
+from src.books.schemas import BOOK_LIST_FIELDS, BOOK_SELECTABLE_FIELDS, BookCreateModel, BookDetailModel, BookImportJobModel, BookImportReportModel, BookListItemModel, BookListPageModel, BookModel, BookSearchPageModel, BookSearchResultModel, BookUpdateModel
+from src.celery_tasks import c_app, import_books_chunk
+from src.db.loading import BOOK_WITH_REVIEWS, NO_RELATIONSHIPS
+from src.db.main import async_session, get_read_session, get_session, read_sessionmaker
+from src.db.redis import redis_client
+from src.serialization import dump_book, dump_books, dump_books_page
+from src.http_cache import cache_headers, is_not_modified, make_etag, not_modified_response
+from src.db.pagination import decode_cursor
+from src.auth.dependencies import RoleChecker, access_token_bearer
+from src.errors import InvalidFieldSelection
 
 
 router = APIRouter()
 book_service = BookService()
-access_token_bearer = AccessTokenBearer()
+book_importer = BookImporter()
 role_checker = Depends(RoleChecker(['admin', 'user']))
 
-@router.get("/", response_model=List[Book], dependencies=[role_checker])
 
-async def get_books(session: AsyncSession = Depends(get_session), token_details:dict = Depends(access_token_bearer)) -> List[BookDetailModel]:
-    """Fetch all books."""
-    print("token_details:dict", token_details)
-    books = await book_service.get_books(session)
-    return books
+def book_fields(fields: Optional[str] = Query(default=None, description="Comma-separated sparse fieldset, e.g. uid,title")) -> Tuple[str, ...]:
+    """Fields a list endpoint should return, in the canonical schema order."""
+    if not fields:
+        return BOOK_LIST_FIELDS
 
-@router.get("/user/{user_uid}", response_model=List[Book], dependencies=[role_checker])
-async def get_user_book_submissions(user_uid: str, session: AsyncSession = Depends(get_session), token_details:dict = Depends(access_token_bearer)) -> List[BookDetailModel]:
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested or not requested <= set(BOOK_SELECTABLE_FIELDS):
+        raise InvalidFieldSelection()
+
+    return tuple(name for name in BOOK_SELECTABLE_FIELDS if name in requested)
+
+
+@router.get("/", response_model=BookListPageModel, dependencies=[role_checker])
+
+async def get_books(
+    request: Request,
+    limit: int = Query(default=Config.BOOKS_PAGE_SIZE, ge=1, le=Config.BOOKS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Literal["recent", "rating", "reviews"] = "recent",
+    stream: bool = False,
+    fields: Tuple[str, ...] = Depends(book_fields),
+    session: AsyncSession = Depends(get_read_session),
+    token_details:dict = Depends(access_token_bearer),
+):
+    """Fetch a page of books, or the whole catalog as NDJSON when stream=true."""
+    if stream:
+        if cursor:
+            decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)  # reject a bad cursor before the 200 starts streaming
+        return StreamingResponse(_stream_books(cursor), media_type="application/x-ndjson")
+
+    async def render_page(session: AsyncSession) -> CachedResponse:
+        books, next_cursor = await book_service.get_books(session, limit=limit, cursor=cursor, sort=sort, fields=fields)
+
+        return CachedResponse(
+            # changes whenever a book on the page is added, removed or updated
+            etag=make_etag("books", sort, limit, cursor, fields, [(book.uid, book.updated_at) for book in books]),
+            last_modified=max((book.updated_at for book in books), default=None),
+            body=dump_books_page(books, next_cursor, fields),
+        )
+
+    # only default first pages are shared by enough clients to be worth keeping in Redis
+    if cursor is None and fields == BOOK_LIST_FIELDS:
+        key = f"books:cache:list:{sort}:{limit}"
+        version, entry = await book_response_cache.get(key, LIST_VERSION_KEY)
+        if entry is None:
+            entry = await book_response_cache.fill(key, version, lambda: _render_on_primary(render_page))
+    else:
+        entry = await render_page(session)
+
+    return _conditional_json_response(request, entry)
+
+
+async def _render_on_primary(render):
+    # A replica can still be behind the write that bumped the cache version, and
+    # whatever is stored under that version is served until the TTL; fill from the primary.
+    async with async_session() as session:
+        return await render(session)
+
+
+def _conditional_json_response(request: Request, entry: CachedResponse) -> Response:
+    headers = cache_headers(entry.etag, entry.last_modified)
+    if is_not_modified(request, entry.etag, entry.last_modified):
+        return not_modified_response(headers)
+
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+async def _stream_books(cursor: Optional[str]):
+    # The stream outlives the request-scoped session, so it holds its own for the server-side cursor
+    async with read_sessionmaker()() as session:
+        async for book in book_service.stream_books(session, cursor=cursor):
+            yield book.model_dump_json() + "\n"
+
+@router.get("/search", response_model=BookSearchPageModel, dependencies=[role_checker])
+async def search_books(
+    q: str = Query(min_length=2, max_length=200),
+    limit: int = Query(default=Config.BOOKS_PAGE_SIZE, ge=1, le=Config.BOOKS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    language: Optional[str] = None,
+    published_from: Optional[date] = None,
+    published_to: Optional[date] = None,
+    min_pages: Optional[int] = Query(default=None, ge=0),
+    max_pages: Optional[int] = Query(default=None, ge=0),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Ranked, typo-tolerant search over title, author and publisher."""
+    rows, next_cursor = await book_service.search_books(
+        session, q, limit=limit, cursor=cursor, language=language,
+        published_from=published_from, published_to=published_to,
+        min_pages=min_pages, max_pages=max_pages,
+    )
+    items = [
+        BookSearchResultModel(**BookModel.model_validate(book, from_attributes=True).model_dump(), score=score)
+        for book, score in rows
+    ]
+
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/user/{user_uid}", response_model=List[BookListItemModel], dependencies=[role_checker])
+async def get_user_book_submissions(user_uid: str, fields: Tuple[str, ...] = Depends(book_fields), session: AsyncSession = Depends(get_read_session), token_details:dict = Depends(access_token_bearer)):
     """Fetch all user books."""
-    books = await book_service.get_user_books(user_uid, session)
-    return books
+    books = await book_service.get_user_books(user_uid, session, fields=fields)
+    return Response(content=dump_books(books, fields), media_type="application/json")
 
 @router.post("/", status_code= status.HTTP_201_CREATED, response_model=BookCreateModel, dependencies=[role_checker])
 async def create_book(book: BookCreateModel, session: AsyncSession = Depends(get_session), token_details:dict = Depends(access_token_bearer)) -> dict:
@@ -40,16 +145,123 @@ async def create_book(book: BookCreateModel, session: AsyncSession = Depends(get
     return book_data
 
 
-@router.get("/{book_id}", dependencies=[role_checker], response_model=BookDetailModel)
-async def get_book(book_id: str, session: AsyncSession = Depends(get_session), token_details:dict = Depends(access_token_bearer)) -> dict:
-    """Fetch a book by its ID."""
-    book = await book_service.get_book(book_id, session)
+@router.post("/import", response_model=BookImportReportModel, dependencies=[role_checker])
+async def import_books(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    mode: Literal["sync", "job"] = "sync",
+    token_details: dict = Depends(access_token_bearer),
+):
+    """Bulk import books from a streamed CSV (with header row) or NDJSON body."""
+    user_uid = token_details.get('user')['user_uid']
+
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    rows = (parse_csv if format == "csv" else parse_ndjson)(request.stream())
+
+    if mode == "sync":
+        report = await book_importer.import_rows(rows, user_uid, async_session)
+        if report.inserted:
+            await book_response_cache.invalidate()
+        return report.as_dict()
 
-    if not book:
+    job_id = uuid.uuid4().hex
+    key = f"book_import:{job_id}"
+    await redis_client.set(f"{key}:owner", user_uid, ex=Config.BOOK_IMPORT_JOB_TTL)
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= Config.BOOK_IMPORT_BATCH_SIZE:
+            await _enqueue_import_chunk(key, chunk, user_uid)
+            chunk = []
+    if chunk:
+        await _enqueue_import_chunk(key, chunk, user_uid)
+
+    chunks = await redis_client.llen(key)
+    return JSONResponse(
+        content={"job_id": job_id, "chunks": chunks},
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+async def _enqueue_import_chunk(key: str, chunk: list, user_uid: str) -> None:
+    # publishing talks to the broker synchronously; keep it off the event loop
+    result = await run_in_threadpool(import_books_chunk.delay, chunk, user_uid)
+    await redis_client.rpush(key, result.id)
+    await redis_client.expire(key, Config.BOOK_IMPORT_JOB_TTL)
+
+
+@router.get("/import/{job_id}", response_model=BookImportJobModel, dependencies=[role_checker])
+async def get_import_job(job_id: str, token_details: dict = Depends(access_token_bearer)):
+    """Progress of an async import job; the merged report once every chunk is done."""
+    key = f"book_import:{job_id}"
+    owner = await redis_client.get(f"{key}:owner")
+    # someone else's job is reported as missing rather than forbidden
+    if owner is None or owner.decode() != str(token_details.get('user')['user_uid']):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+
+    task_ids = await redis_client.lrange(key, 0, -1)
+    if not task_ids:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+
+    return await run_in_threadpool(_collect_import_job, job_id, [t.decode() for t in task_ids])
+
+
+def _collect_import_job(job_id: str, task_ids: List[str]) -> dict:
+    results = [c_app.AsyncResult(task_id) for task_id in task_ids]
+    done = [r for r in results if r.ready()]
+
+    report = None
+    if len(done) == len(results):
+        merged = BookImportReport()
+        for r in done:
+            if r.successful():
+                merged.merge(r.result)
+            else:
+                merged.add_error(0, [f"chunk {r.id} failed: {r.result!r}"])
+        report = merged.as_dict()
+
+    return {"job_id": job_id, "chunks": len(results), "chunks_done": len(done), "report": report}
+
+
+@router.get("/{book_id}", dependencies=[role_checker], response_model=Union[BookDetailModel, BookModel])
+async def get_book(book_id: str, request: Request, include_reviews: bool = True, session: AsyncSession = Depends(get_read_session), token_details:dict = Depends(access_token_bearer)) -> dict:
+    """Fetch a book by its ID; include_reviews=false leaves the review list out (see GET /reviews/book/{id})."""
+    try:
+        book_id = str(uuid.UUID(book_id))  # one canonical spelling per cache key
+    except ValueError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
-    
-    print(f"Retrieved book: {book}")
-    return book  # Convert to dict if needed
+
+    key = f"books:cache:detail:{book_id}:{int(include_reviews)}"
+    version, entry = await book_response_cache.get(key, book_version_key(book_id))
+
+    if entry is None:
+        # updated_at moves on every edit and every new review, so it versions the whole response
+        updated_at = await book_service.get_book_updated_at(book_id, session)
+        if updated_at is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+
+        etag = make_etag("book", book_id, updated_at, include_reviews)
+        if is_not_modified(request, etag, updated_at):
+            return not_modified_response(cache_headers(etag, updated_at))
+
+        async def render_book(session: AsyncSession) -> Optional[CachedResponse]:
+            load = BOOK_WITH_REVIEWS if include_reviews else NO_RELATIONSHIPS
+            book = await book_service.get_book(book_id, session, load=load)
+            if not book:
+                return None
+
+            return CachedResponse(
+                etag=make_etag("book", book_id, book.updated_at, include_reviews),
+                last_modified=book.updated_at,
+                body=dump_book(book, include_reviews),
+            )
+
+        entry = await book_response_cache.fill(key, version, lambda: _render_on_primary(render_book))
+        if entry is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+
+    return _conditional_json_response(request, entry)
     
 
 
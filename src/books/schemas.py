@@ -1,7 +1,8 @@
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 import uuid
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field, create_model
 
 from src.db.models import Review
 
@@ -11,15 +12,63 @@ class BookModel(BaseModel):
     title: str
     author: str
     publisher: str
-    published_date: datetime
+    published_date: date
     page_count: int
     language: str
+    review_count: int = 0
+    rating_sum: int = 0
+    rating_histogram: Dict[str, int] = {}
     created_at: datetime
     updated_at: datetime
 
+    @computed_field
+    @property
+    def average_rating(self) -> Optional[float]:
+        return self.rating_sum / self.review_count if self.review_count else None
+
 class BookDetailModel(BookModel):
     reviews: List[Review]
 
+class BookPageModel(BaseModel):
+    items: List[BookModel]
+    next_cursor: Optional[str] = None
+
+class BookListItemModel(BaseModel):
+    uid: uuid.UUID
+    title: str
+    author: str
+    published_date: date
+    review_count: int = 0
+
+class BookListPageModel(BaseModel):
+    items: List[BookListItemModel]
+    next_cursor: Optional[str] = None
+
+# Fields list endpoints return by default, and every field a client may ask for with fields=
+BOOK_LIST_FIELDS = tuple(BookListItemModel.model_fields)
+BOOK_SELECTABLE_FIELDS = tuple(BookModel.model_fields) + ("average_rating",)
+
+@lru_cache(maxsize=64)
+def book_list_page_model(fields: Tuple[str, ...]) -> type:
+    """Page schema for a sparse fieldset, built once per distinct selection."""
+    if fields == BOOK_LIST_FIELDS:
+        return BookListPageModel
+
+    item_fields = {
+        name: (Optional[float], None) if name == "average_rating"
+        else (BookModel.model_fields[name].annotation, ...)
+        for name in fields
+    }
+    item_model = create_model("BookFieldsModel", **item_fields)
+    return create_model("BookFieldsPageModel", items=(List[item_model], ...), next_cursor=(Optional[str], None))
+
+class BookSearchResultModel(BookModel):
+    score: float
+
+class BookSearchPageModel(BaseModel):
+    items: List[BookSearchResultModel]
+    next_cursor: Optional[str] = None
+
 class BookCreateModel(BaseModel):
     title: str
     author: str
@@ -33,4 +82,20 @@ class BookUpdateModel(BaseModel):
     author: str
     publisher: str
     page_count: int
-    language: str
\ No newline at end of file
+    language: str
+
+class BookImportError(BaseModel):
+    line: int
+    errors: List[str]
+
+class BookImportReportModel(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BookImportError]
+    errors_truncated: bool = False
+
+class BookImportJobModel(BaseModel):
+    job_id: str
+    chunks: int
+    chunks_done: int = 0
+    report: Optional[BookImportReportModel] = None
@@ -1,23 +1,143 @@
-from datetime import datetime
-from typing import List
-from unittest import result
+import uuid
+from datetime import date, datetime
+from typing import AsyncIterator, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import Row, func, literal_column, tuple_
 from sqlmodel import select, desc
 from sqlmodel.ext.asyncio.session import AsyncSession
+from src.config import Config
+from src.db.loading import BOOK_WITH_REVIEWS, NO_RELATIONSHIPS, LoadProfile, with_profile
 from src.db.models import Book
-from .schemas import BookModel, BookCreateModel, BookUpdateModel
+from src.db.pagination import decode_cursor, encode_cursor
+from .cache import book_response_cache
+from .ratings import BOOK_SORT_COLUMNS, BOOK_SORTS
+from .schemas import BOOK_LIST_FIELDS, BookModel, BookCreateModel, BookUpdateModel
+
+# Generated tsvector column added by migration 3c8d0f6e2b91; it is kept off the
+# model so ordinary book queries never fetch it
+search_vector = literal_column("books.search_vector")
+# Must match the ix_books_title_author_trgm expression (the separator is inlined, not bound)
+title_author = Book.title.op("||")(literal_column("' '")).op("||")(Book.author)
+
+
+def book_columns(fields: Iterable[str], sort: Optional[str] = None) -> list:
+    """Columns to select for a list view: the requested fields plus what the
+    cursor and the ETag are computed from."""
+    names = {"uid", "updated_at"}
+    for name in fields:
+        names.update(("rating_sum", "review_count") if name == "average_rating" else (name,))
+    if sort:
+        names.update(BOOK_SORT_COLUMNS[sort])
+
+    return [getattr(Book, name) for name in sorted(names)]
+
 
 class BookService:
-    async def get_books(self, session: AsyncSession):
-        """Fetch all books from the database."""
-        statement = select(Book).order_by(desc(Book.created_at))
-        
+    def _books_after(self, cursor: Optional[str], sort: str = "recent", columns: Optional[Sequence] = None):
+        """Descending statement over (sort key, uid), starting after the given cursor.
+
+        With columns, rows come back as plain tuples instead of Book entities.
+        """
+        key, key_type, _ = BOOK_SORTS[sort]
+        statement = select(*columns) if columns else select(Book)
+        statement = statement.order_by(desc(key), desc(Book.uid))
+
+        if cursor:
+            value, uid = decode_cursor(cursor, key_type, uuid.UUID)
+            statement = statement.where(tuple_(key, Book.uid) < tuple_(value, uid))
+
+        return statement
+
+    async def get_books(self, session: AsyncSession, limit: int = Config.BOOKS_PAGE_SIZE, cursor: Optional[str] = None, sort: str = "recent", fields: Sequence[str] = BOOK_LIST_FIELDS) -> Tuple[List[Row], Optional[str]]:
+        """Fetch one page of book rows, projected to `fields`, and the cursor for the next page."""
+        statement = self._books_after(cursor, sort, book_columns(fields, sort)).limit(limit + 1)
+
         result = await session.exec(statement)
+        books = result.all()
 
-        return result.all()
+        next_cursor = None
+        if len(books) > limit:
+            books = books[:limit]
+            last = books[-1]
+            next_cursor = encode_cursor(BOOK_SORTS[sort][2](last), last.uid)
+
+        return books, next_cursor
+
+    async def stream_books(self, session: AsyncSession, cursor: Optional[str] = None) -> AsyncIterator[Book]:
+        """Yield every book from a server-side cursor, one batch in memory at a time."""
+        statement = self._books_after(cursor).execution_options(yield_per=Config.BOOKS_STREAM_BATCH_SIZE)
+
+        result = await session.stream_scalars(statement)
+        async for book in result:
+            yield book
     
-    async def get_user_books(self, user_uid, session: AsyncSession):
-        """Fetch all books from the database."""
-        statement = select(Book).where(Book.user_uid == user_uid).order_by(desc(Book.created_at))
+    def _search_statement(
+        self,
+        q: str,
+        cursor: Optional[str] = None,
+        language: Optional[str] = None,
+        published_from: Optional[date] = None,
+        published_to: Optional[date] = None,
+        min_pages: Optional[int] = None,
+        max_pages: Optional[int] = None,
+    ):
+        """(Book, score) rows matching `q` and the filters, best first, starting after the cursor."""
+        query = func.websearch_to_tsquery(literal_column("'simple'::regconfig"), q)
+        score = (func.ts_rank_cd(search_vector, query) + func.similarity(title_author, q)).label("score")
+
+        statement = (
+            select(Book, score)
+            .where(search_vector.op("@@")(query) | title_author.op("%")(q))
+            .order_by(desc(score), desc(Book.uid))
+        )
+
+        if language:
+            statement = statement.where(Book.language == language)
+        if published_from:
+            statement = statement.where(Book.published_date >= published_from)
+        if published_to:
+            statement = statement.where(Book.published_date <= published_to)
+        if min_pages is not None:
+            statement = statement.where(Book.page_count >= min_pages)
+        if max_pages is not None:
+            statement = statement.where(Book.page_count <= max_pages)
+        if cursor:
+            last_score, uid = decode_cursor(cursor, float, uuid.UUID)
+            statement = statement.where(tuple_(score, Book.uid) < tuple_(last_score, uid))
+
+        return statement
+
+    async def search_books(
+        self,
+        session: AsyncSession,
+        q: str,
+        limit: int = Config.BOOKS_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        language: Optional[str] = None,
+        published_from: Optional[date] = None,
+        published_to: Optional[date] = None,
+        min_pages: Optional[int] = None,
+        max_pages: Optional[int] = None,
+    ) -> Tuple[List[Tuple[Book, float]], Optional[str]]:
+        """Rank books by full-text match on title/author/publisher plus trigram similarity."""
+        statement = self._search_statement(
+            q, cursor, language=language, published_from=published_from, published_to=published_to,
+            min_pages=min_pages, max_pages=max_pages,
+        )
+
+        result = await session.exec(statement.limit(limit + 1))
+        rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            book, last_score = rows[-1]
+            next_cursor = encode_cursor(last_score, book.uid)
+
+        return rows, next_cursor
+
+    async def get_user_books(self, user_uid, session: AsyncSession, fields: Sequence[str] = BOOK_LIST_FIELDS) -> List[Row]:
+        """Fetch rows for all of a user's books, projected to `fields`."""
+        statement = select(*book_columns(fields)).where(Book.user_uid == user_uid).order_by(desc(Book.created_at))
         
         result = await session.exec(statement)
 
@@ -25,25 +145,33 @@ class BookService:
     
 
 
-    async def get_book(self, book_id: int, session: AsyncSession):
+    async def get_book(self, book_id: int, session: AsyncSession, load: LoadProfile = NO_RELATIONSHIPS):
         """Fetch a single book by its ID."""
-        statement = select(Book).where(Book.uid == book_id)
+        statement = with_profile(select(Book).where(Book.uid == book_id), load)
         result = await session.exec(statement)
 
         book = result.first()
 
         return book if book else None
 
+    async def get_book_updated_at(self, book_id: str, session: AsyncSession) -> Optional[datetime]:
+        """Fetch only a book's updated_at, for conditional requests."""
+        statement = select(Book.updated_at).where(Book.uid == book_id)
+        result = await session.exec(statement)
+
+        return result.first()
+
     async def create_book(self, book: BookCreateModel, user_uid: str, session: AsyncSession):
         """Create a new book in the database."""
         book_dic = book.model_dump()
 
         new_book = Book(**book_dic)
         new_book.user_uid = user_uid
-        new_book.published_date = datetime.strptime(book_dic['published_date'], "%Y-%m-%d")
+        new_book.published_date = date.fromisoformat(book_dic['published_date'])
 
         session.add(new_book)
         await session.commit()
+        await book_response_cache.invalidate()
         return new_book
 
     async def update_book(self, book_id: int, book: BookUpdateModel, session: AsyncSession):
@@ -56,17 +184,21 @@ class BookService:
         book_data = book.model_dump(exclude_unset=True)
         for key, value in book_data.items():
             setattr(book_to_update, key, value)
+        book_to_update.updated_at = datetime.now()
 
         await session.commit()
+        await book_response_cache.invalidate(book_to_update.uid)
 
         return book_to_update
 
     async def delete_book(self, book_id: int, session: AsyncSession):
         """Delete a book by its ID."""
-        book_to_delete = await self.get_book(book_id, session)
+        # reviews are loaded so the flush can detach them from the deleted book
+        book_to_delete = await self.get_book(book_id, session, load=BOOK_WITH_REVIEWS)
         if not book_to_delete:
             return None
         
         await session.delete(book_to_delete)
         await session.commit()
+        await book_response_cache.invalidate(book_to_delete.uid)
         return book_to_delete
\ No newline at end of file
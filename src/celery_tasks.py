@@ -1,21 +1,114 @@
-from typing import List
+import asyncio
+import smtplib
+import time
+import uuid
+from typing import List, Optional
 from celery import Celery
-from asgiref.sync import async_to_sync
-from src.mail import mail, create_message
+from celery.signals import after_task_publish, before_task_publish, worker_process_init
+from starlette.concurrency import run_in_threadpool
+from src.books.cache import invalidate_from_worker
+from src.books.importer import import_chunk
+from src.books.ratings import reconcile_ratings
+from src.config import Config
+from src.db.main import worker_session
+from src import mail_outbox
+from src.email_templates import warm_templates
+from src.smtp import mail_rate_limiter, message_from, send_batch, smtp_pool
+from src.metrics import CELERY_ENQUEUE_DURATION
 
 c_app = Celery('Tasks')
 
 c_app.config_from_object('src.config')
 
+@worker_process_init.connect
+def _compile_templates(**kwargs):
+    # each prefork child compiles the email templates once, before its first task
+    warm_templates()
+
+
+# The publish start time travels in the message headers, which both signals see,
+# so nothing is left behind when a publish raises between them
+PUBLISH_STARTED_HEADER = "bookly_publish_started"
+
+
+@before_task_publish.connect
+def _publish_started(headers=None, **kwargs):
+    if headers is not None:
+        headers[PUBLISH_STARTED_HEADER] = time.perf_counter()
+
+
+@after_task_publish.connect
+def _publish_finished(sender=None, headers=None, **kwargs):
+    started = (headers or {}).get(PUBLISH_STARTED_HEADER)
+    if started is not None:
+        CELERY_ENQUEUE_DURATION.labels(sender).observe(time.perf_counter() - started)
+
+@c_app.task(
+    autoretry_for=(smtplib.SMTPException, OSError),
+    dont_autoretry_for=(smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=Config.MAIL_MAX_RETRIES,
+)
+def send_email(
+    recipients: List[str],
+    subject: str = "",
+    body: str = "",
+    template: Optional[str] = None,
+    context: Optional[dict] = None,
+    locale: Optional[str] = None,
+):
+    """Send one email over this worker's pooled SMTP connection, retrying with backoff"""
+    mail_rate_limiter.wait()
+    smtp_pool.send(message_from({
+        "recipients": recipients, "subject": subject, "body": body,
+        "template": template, "context": context, "locale": locale,
+    }))
+
+
 @c_app.task
-def send_email(recipients: List[str], subject: str, body: str):
-    message = create_message(
-        recipients=recipients, subject=subject, body=body
-    )
+def drain_email_outbox() -> int:
+    """Send everything in the email outbox, a batch per pooled connection checkout"""
+    mail_outbox.clear_scheduled()
+    mail_outbox.recover_abandoned()
+    drain_id = uuid.uuid4().hex
+    handled = 0
 
-    async_to_sync(mail.send_message)(message)
-    # bg_tasks.add_task(mail.send_message, message)  # await mail.send_message(message)
+    while batch := mail_outbox.claim_batch(drain_id, Config.MAIL_BATCH_SIZE):
+        failed = send_batch(batch, smtp_pool, mail_rate_limiter)
+        # transient failures fall back to single sends, which carry the retry policy
+        for data in failed:
+            send_email.delay(**data)
+        mail_outbox.ack(drain_id)
+        handled += len(batch) - len(failed)
+
+    return handled
+
+
+async def queue_email(recipients: List[str], template: str, context: dict, locale: Optional[str] = None) -> None:
+    """Add an email to the outbox; a drain renders and sends it within MAIL_BATCH_DELAY seconds"""
+    if await mail_outbox.push(recipients, template, context, locale):
+        # publishing is a blocking broker round trip; keep it off the event loop
+        await run_in_threadpool(drain_email_outbox.apply_async, countdown=Config.MAIL_BATCH_DELAY)
+
+
+@c_app.task
+def import_books_chunk(rows: List[list], user_uid: str) -> dict:
+    """Validate and COPY one chunk of an async bulk book import"""
+    report = asyncio.run(import_chunk(rows, user_uid))
+    if report["inserted"]:
+        invalidate_from_worker()
+    return report
+
+
+@c_app.task
+def reconcile_book_ratings(batch_size: int = Config.RATING_RECONCILE_BATCH_SIZE) -> int:
+    """Rebuild every book's rating aggregates from its reviews, in batches"""
+    # every rebuilt book's cached detail goes, along with the list pages
+    return asyncio.run(reconcile_ratings(worker_session, batch_size, invalidate_from_worker))
 
 
 
-# celery -A src.celery_tasks.c_app worker  --pool=solo --loglevel=info (command to run worker)
\ No newline at end of file
+# celery -A src.celery_tasks.c_app worker --pool=prefork --concurrency=4 --loglevel=info (command to run worker)
+# celery -A src.celery_tasks.c_app beat --loglevel=info (periodic outbox sweep)
\ No newline at end of file
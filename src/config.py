@@ -3,6 +3,16 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DATABASE_REPLICA_URLS: str = ""  # comma separated
+    READ_YOUR_WRITES_SECONDS: int = 5
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # set to 0 behind pgbouncer in transaction mode
+    DB_COMMAND_TIMEOUT: float = 30
+    DB_STATEMENT_TIMEOUT_MS: int = 15000
     JWT_SECRET: str
     JWT_ALGORITHM: str
     REDIS_HOST: str = "localhost"
@@ -27,6 +37,88 @@ class Settings(BaseSettings):
 
     DOMAIN: str
 
+    MAIL_SMTP_POOL_SIZE: int = 2  # per worker process
+    MAIL_SMTP_TIMEOUT: float = 30
+    MAIL_SMTP_IDLE_TIMEOUT: float = 60
+    MAIL_SMTP_MAX_MESSAGES: int = 100  # reconnect after this many sends
+    MAIL_BATCH_SIZE: int = 50
+    MAIL_BATCH_DELAY: float = 1.0  # how long the outbox collects before a drain runs
+    MAIL_BATCH_DELAY_MAX: int = 60
+    MAIL_OUTBOX_LEASE_TTL: int = 300  # a claimed batch not acked within this is put back in the outbox
+    MAIL_OUTBOX_SWEEP_INTERVAL: float = 60  # celery beat drains the outbox this often, in case a drain was lost
+    MAIL_RATE_LIMIT: float = 10  # messages per second per worker process, 0 for unlimited
+    MAIL_MAX_RETRIES: int = 5
+    CELERY_WORKER_CONCURRENCY: int = 4
+    NOTIFICATION_IDEMPOTENCY_TTL: int = 300
+    EMAIL_DEFAULT_LOCALE: str = "en"
+
+    PASSWORD_HASH_EXECUTOR: str = "process"  # or "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: int = 3600
+
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_LOCAL_TTL: int = 30
+    USER_CACHE_TTL: int = 300
+
+    # build list/detail JSON straight from rows with orjson, skipping pydantic validation
+    FAST_SERIALIZATION: bool = False
+
+    BOOKS_PAGE_SIZE: int = 20
+    BOOKS_MAX_PAGE_SIZE: int = 100
+    BOOKS_STREAM_BATCH_SIZE: int = 500
+    # responses are per user (Authorization), so shared caches must revalidate
+    BOOKS_CACHE_CONTROL: str = "private, max-age=0, must-revalidate"
+    BOOKS_RESPONSE_CACHE_ENABLED: bool = True
+    BOOKS_RESPONSE_CACHE_TTL: int = 300
+    BOOKS_RESPONSE_CACHE_LOCK_TTL: int = 5000  # ms
+    BOOKS_RESPONSE_CACHE_VERSION_TTL: int = 86400
+    BOOK_IMPORT_BATCH_SIZE: int = 5000
+    BOOK_IMPORT_MAX_ERRORS: int = 1000
+    BOOK_IMPORT_JOB_TTL: int = 86400
+    RATING_RECONCILE_BATCH_SIZE: int = 1000
+
+    REVIEWS_PAGE_SIZE: int = 20
+    REVIEWS_MAX_PAGE_SIZE: int = 100
+
+    # per-request query counts/time, Server-Timing headers and N+1 warnings
+    SQL_PROFILING: bool = False
+    SQL_PROFILING_MAX_QUERIES: int = 10
+    SQL_PROFILING_REPEAT_THRESHOLD: int = 3
+
+    # "<count>/<second|minute|hour|day>" per route; an empty string switches a limit off
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN_IP: str = "30/minute"
+    RATE_LIMIT_LOGIN_ACCOUNT: str = "5/minute"
+    RATE_LIMIT_SIGNUP_IP: str = "10/hour"
+    RATE_LIMIT_PASSWORD_RESET_IP: str = "10/hour"
+    RATE_LIMIT_PASSWORD_RESET_ACCOUNT: str = "3/hour"
+    RATE_LIMIT_SEND_MAIL_IP: str = "10/hour"
+    # tokens a worker may take from Redis at once for high limits; leases expire unused
+    RATE_LIMIT_LEASE_SIZE: int = 10
+    RATE_LIMIT_LEASE_TTL: float = 1.0
+    RATE_LIMIT_LOCAL_KEYS: int = 10000
+    # take the client address from X-Forwarded-For (only behind a trusted proxy)
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+    # proxies in front of the app that append to X-Forwarded-For; the client is the entry the outermost one added
+    RATE_LIMIT_PROXY_HOPS: int = 1
+
+    ACCESS_LOG_ENABLED: bool = True
+    # share of successful requests that are logged; errors and slow requests always are
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_SLOW_MS: int = 1000
+    ACCESS_LOG_QUEUE_SIZE: int = 10000
+    REQUEST_ID_HEADER: str = "X-Request-ID"
+
+    # /metrics answers scrapers from these addresses, or any caller sending "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_ALLOWED_IPS: str = "127.0.0.1,::1"  # comma separated
+    METRICS_TOKEN: str = ""
+
+    ALLOWED_HOSTS: str = "localhost,127.0.0.1"  # comma separated, "*.example.com" matches subdomains
+    CORS_ALLOW_ORIGINS: str = "*"  # comma separated
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
@@ -36,3 +128,11 @@ Config = Settings()
 broker_url = Config.REDIS_URL
 result_backend = Config.REDIS_URL
 broker_connection_retry_on_startup = True
+worker_pool = "prefork"
+worker_concurrency = Config.CELERY_WORKER_CONCURRENCY
+beat_schedule = {
+    "sweep-email-outbox": {
+        "task": "src.celery_tasks.drain_email_outbox",
+        "schedule": Config.MAIL_OUTBOX_SWEEP_INTERVAL,
+    },
+}
@@ -0,0 +1,32 @@
+from typing import Sequence
+
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from src.db.models import Book, User
+
+# Every relationship on the models is lazy="raise", so a query only touches the
+# tables its caller asked for here. Touching anything else fails loudly instead
+# of quietly costing another round trip.
+LoadProfile = Sequence[LoaderOption]
+
+NO_RELATIONSHIPS: LoadProfile = ()
+
+# BookDetailModel
+BOOK_WITH_REVIEWS: LoadProfile = (selectinload(Book.reviews),)
+
+# UserBooksModel (/auth/me)
+USER_WITH_BOOKS_AND_REVIEWS: LoadProfile = (
+    selectinload(User.books),
+    selectinload(User.reviews),
+)
+
+
+def with_profile(statement, profile: LoadProfile):
+    """Apply a loading profile to a select statement."""
+    if not profile:
+        return statement
+
+    # Refresh instances the session already holds, otherwise their unloaded
+    # relationships would stay unloaded
+    return statement.options(*profile).execution_options(populate_existing=True)
@@ -1,18 +1,135 @@
-from sqlmodel import create_engine, SQLModel
-from sqlalchemy.ext.asyncio import AsyncEngine
+import time
+from itertools import cycle
+from fastapi import Request
+from sqlmodel import SQLModel
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
+from src.cache import TTLCache
 from src.config import Config
+from src.db.redis import redis_client
+from src.db.profiling import instrument_engine
+from src.metrics import DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT_WAIT
 
 
-# Create an asynchronous engine for the database connection
-engine = AsyncEngine(
-    create_engine(
-        url=Config.DATABASE_URL,
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also records how long callers wait to check a connection out."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_time_total = 0.0
+        self.checkout_time_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.checkout_time_total += waited
+            self.checkout_time_max = max(self.checkout_time_max, waited)
+            DB_POOL_CHECKOUT_WAIT.labels(self.logging_name or "default").observe(waited)
+
+
+def _track_checkouts(engine, name: str) -> None:
+    # pool events fire once per connection actually handed out and returned, and
+    # survive the pool being recreated by dispose()
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    event.listen(engine.sync_engine, "checkout", lambda *args: checked_out.inc())
+    event.listen(engine.sync_engine, "checkin", lambda *args: checked_out.dec())
+
+
+def _build_engine(url: str, name: str):
+    engine = create_async_engine(
+        url,
         echo=False,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_MAX_OVERFLOW,
+        pool_timeout=Config.DB_POOL_TIMEOUT,
+        pool_recycle=Config.DB_POOL_RECYCLE,
+        pool_pre_ping=Config.DB_POOL_PRE_PING,
+        connect_args={
+            "statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+            "command_timeout": Config.DB_COMMAND_TIMEOUT,
+            "server_settings": {"statement_timeout": str(Config.DB_STATEMENT_TIMEOUT_MS)},
+        },
     )
+    _track_checkouts(engine, name)
+    return engine
+
+
+# Create an asynchronous engine for the database connection.
+# Each uvicorn worker gets its own pool, so Postgres sees up to
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+engine = _build_engine(Config.DATABASE_URL, "primary")
+
+
+class PrimarySession(AsyncSession):
+    """Session on the primary that records its request's user as a recent writer.
+
+    The marker is set as part of commit, so it is in place before the route
+    returns; a read sent right after the response always finds it.
+    """
+
+    async def commit(self) -> None:
+        await super().commit()
+
+        user_uid = self.info.get("user_uid")
+        if replica_engines and user_uid:
+            await _mark_recent_write(user_uid)
+
+
+# Built once; every request session comes from this factory
+async_session = sessionmaker(bind=engine, class_=PrimarySession, expire_on_commit=False)
+
+# Celery tasks run each call on a fresh event loop (asyncio.run), so they must
+# not share pooled connections between calls
+worker_engine = create_async_engine(Config.DATABASE_URL, poolclass=NullPool)
+worker_session = sessionmaker(bind=worker_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Read replicas, used round-robin by get_read_session
+replica_engines = [
+    _build_engine(url, f"replica{i}")
+    for i, url in enumerate(u.strip() for u in Config.DATABASE_REPLICA_URLS.split(",") if u.strip())
+]
+replica_sessions = cycle(
+    [sessionmaker(bind=e, class_=AsyncSession, expire_on_commit=False) for e in replica_engines]
+    or [async_session]
 )
 
+if Config.SQL_PROFILING:
+    for _engine in [engine, *replica_engines]:
+        instrument_engine(_engine)
+
+# Users who committed in the last READ_YOUR_WRITES_SECONDS read from the primary
+recent_writers = TTLCache(maxsize=Config.USER_CACHE_SIZE, ttl=Config.READ_YOUR_WRITES_SECONDS)
+
+
+async def _mark_recent_write(user_uid: str) -> None:
+    recent_writers.set(user_uid, True)
+    await redis_client.set(f"recent_write:{user_uid}", 1, ex=Config.READ_YOUR_WRITES_SECONDS)
+
+
+async def _wrote_recently(user_uid: str) -> bool:
+    if recent_writers.get(user_uid):
+        return True
+
+    # the write may have gone through another worker
+    return bool(await redis_client.exists(f"recent_write:{user_uid}"))
+
+
+def _request_user_uid(request: Request):
+    user = getattr(request.state, "user", None)
+
+    return str(user.uid) if user is not None else None
+
+
 async def init_db():
     """Initialize the database connection."""
     async with engine.begin() as conn:
@@ -28,8 +145,63 @@ async def init_db():
 
 from typing import AsyncGenerator
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """Get a new session for database operations."""
-    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
-    async with Session() as session:
-        yield session
\ No newline at end of file
+    async with async_session() as session:
+        # commits mark this user for read-your-writes (see PrimarySession)
+        session.info["user_uid"] = _request_user_uid(request)
+        yield session
+
+
+def read_sessionmaker():
+    """Session factory for the next read replica (the primary when none are configured)."""
+    return next(replica_sessions)
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Get a session for read-only handlers, served by a replica when it is safe to.
+
+    The caller is taken from request.state, so the route must resolve the
+    current user first (route-level `dependencies=[role_checker]` run before
+    parameter dependencies). A user who committed within the last
+    READ_YOUR_WRITES_SECONDS is kept on the primary so they see their own writes.
+    """
+    factory = async_session
+    if replica_engines:
+        user_uid = _request_user_uid(request)
+        if user_uid is None or not await _wrote_recently(user_uid):
+            factory = read_sessionmaker()
+
+    async with factory() as session:
+        yield session
+
+
+async def primary_is_up() -> bool:
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception:
+        return False
+    return True
+
+
+def _pool_stats(engine) -> dict:
+    pool = engine.pool
+
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkouts": pool.checkouts,
+        "checkout_wait_total_s": round(pool.checkout_time_total, 6),
+        "checkout_wait_max_s": round(pool.checkout_time_max, 6),
+    }
+
+
+def pool_stats() -> dict:
+    """Connection pool usage for this worker process."""
+    return {
+        "primary": _pool_stats(engine),
+        "replicas": [_pool_stats(e) for e in replica_engines],
+    }
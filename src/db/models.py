@@ -1,6 +1,7 @@
 from datetime import datetime,date
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
+from sqlalchemy import Index, text
 from sqlmodel import Column, Field, Relationship, SQLModel
 import sqlalchemy.dialects.postgresql as pg
 # from src.books import models
@@ -8,6 +9,7 @@ import sqlalchemy.dialects.postgresql as pg
 
 class User(SQLModel, table=True):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_email", "email", unique=True),)
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
@@ -27,10 +29,10 @@ class User(SQLModel, table=True):
         sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now),
     )
     books: List["Book"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
     )
     reviews: List["Review"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "raise"}
     )
 
     def __repr__(self):
@@ -39,6 +41,16 @@ class User(SQLModel, table=True):
 
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_created_at_uid", "created_at", "uid"),
+        Index("ix_books_user_uid_created_at", "user_uid", "created_at"),
+        Index("ix_books_review_count_uid", "review_count", "uid"),
+        Index(
+            "ix_books_average_rating_uid",
+            text("coalesce(rating_sum::float8 / nullif(review_count, 0), 0)"),
+            "uid",
+        ),
+    )
 
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
@@ -50,15 +62,28 @@ class Book(SQLModel, table=True):
     page_count: int
     language: str
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="users.uid")
+    # Rating aggregates, kept in step by ReviewService and rebuilt by reconcile_book_ratings
+    review_count: int = Field(
+        default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0")
+    )
+    rating_sum: int = Field(
+        default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0")
+    )
+    rating_histogram: Dict[str, int] = Field(
+        default_factory=dict,
+        sa_column=Column(pg.JSONB, nullable=False, server_default="{}"),
+    )
     created_at: datetime = Field(
         sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now),
     )
     updated_at: datetime = Field(
         sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now),
     )
-    user: Optional["User"] = Relationship(back_populates="books")
+    user: Optional["User"] = Relationship(
+        back_populates="books", sa_relationship_kwargs={"lazy": "raise"}
+    )
     reviews: List["Review"] = Relationship(
-        back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="book", sa_relationship_kwargs={"lazy": "raise"}
     )
 
     def __repr__(self):
@@ -67,6 +92,12 @@ class Book(SQLModel, table=True):
 
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_book_uid_created_at", "book_uid", "created_at"),
+        Index("ix_reviews_user_uid_created_at", "user_uid", "created_at"),
+        Index("ix_reviews_book_uid_rating_uid", "book_uid", "rating", "uid"),
+        Index("ix_reviews_user_uid_rating_uid", "user_uid", "rating", "uid"),
+    )
 
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
@@ -81,8 +112,12 @@ class Review(SQLModel, table=True):
     updated_at: datetime = Field(
         sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now),
     )
-    user: Optional["User"] = Relationship(back_populates="reviews")
-    book: Optional["Book"] = Relationship(back_populates="reviews")
+    user: Optional["User"] = Relationship(
+        back_populates="reviews", sa_relationship_kwargs={"lazy": "raise"}
+    )
+    book: Optional["Book"] = Relationship(
+        back_populates="reviews", sa_relationship_kwargs={"lazy": "raise"}
+    )
 
     def __repr__(self):
         return f"<Review for book {self.book_uid} by user {self.user_uid}>"
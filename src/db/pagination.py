@@ -0,0 +1,38 @@
+import base64
+import json
+import uuid
+from datetime import date
+from typing import Callable, Tuple
+
+from src.errors import InvalidCursor
+
+
+def _plain(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(*values) -> str:
+    """Encode the keyset position of the last row of a page into an opaque cursor."""
+    raw = json.dumps([_plain(v) for v in values], separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: Callable) -> Tuple:
+    """Decode a cursor produced by `encode_cursor`, converting each value with the given types."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if len(values) != len(types):
+            raise ValueError("cursor does not match this listing")
+
+        if not all(isinstance(value, (str, int, float)) for value in values):
+            raise ValueError("cursor values must be strings or numbers")
+
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise InvalidCursor() from e
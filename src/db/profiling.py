@@ -0,0 +1,105 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+
+from src.config import Config
+
+sql_logger = logging.getLogger("bookly.sql")
+
+
+@dataclass
+class QueryStats:
+    queries: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed: float, rows: int) -> None:
+        self.queries += 1
+        self.db_time += elapsed
+        self.rows += rows
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[tuple]:
+        """Statement shapes issued at least `threshold` times, most frequent first."""
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries, {self.rows} rows"'
+
+
+# Stats of the request being served; statements run outside a profiled request are ignored
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Open capture_queries() blocks; they see statements from every task and thread
+_captures: List[QueryStats] = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats.get()
+    if stats is None and not _captures:
+        return
+
+    elapsed = time.perf_counter() - context._query_started
+
+    rows = max(getattr(cursor, "rowcount", 0) or 0, 0)
+    if stats is not None:
+        stats.record(statement, elapsed, rows)
+    for capture in _captures:
+        capture.record(statement, elapsed, rows)
+
+
+def instrument_engine(engine) -> None:
+    """Attach the query counters to an engine (sync or async). Safe to call twice."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryStats]:
+    """Count the statements issued by the current task (and tasks it starts) inside the block."""
+    stats = QueryStats()
+    token = current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_stats.reset(token)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Count every statement issued anywhere in the process inside the block.
+
+    Meant for tests, where the app may run on another thread than the caller.
+    """
+    stats = QueryStats()
+    _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        _captures.remove(stats)
+
+
+def warn_if_suspicious(stats: QueryStats, label: str) -> None:
+    """Log a warning for query-heavy requests and for repeated statements (likely N+1)."""
+    if stats.queries > Config.SQL_PROFILING_MAX_QUERIES:
+        sql_logger.warning(
+            "%s issued %d queries (budget %d)", label, stats.queries, Config.SQL_PROFILING_MAX_QUERIES
+        )
+
+    for statement, count in stats.repeated(Config.SQL_PROFILING_REPEAT_THRESHOLD):
+        sql_logger.warning(
+            "%s ran the same statement %d times, possible N+1: %s", label, count, statement[:200]
+        )
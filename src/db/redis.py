@@ -1,25 +1,150 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
 from src.config import Config
+from src.metrics import REDIS_COMMAND_DURATION
 import redis.asyncio as redis
+import redis as redis_sync
+from redis.asyncio.client import Pipeline
 
 
 
 JTI_EXPIRY = 3600
 
+# Every revocation is also recorded in a sorted set (jti -> expiry timestamp) and
+# announced on a channel, so each worker can mirror the blocklist in memory
+BLOCKLIST_KEY = "token_blocklist"
+BLOCKLIST_CHANNEL = "token_blocklist:revoked"
+
 # token_blocklist = redis.Redis(
 #     host=Config.REDIS_HOST,
 #     port=Config.REDIS_PORT,
 #     db=0
 # )
 
-token_blocklist = redis.from_url(Config.REDIS_URL)
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_DURATION.labels("PIPELINE").observe(time.perf_counter() - start)
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client that records the round-trip time of every command."""
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.labels(str(args[0]).upper()).observe(time.perf_counter() - start)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> Pipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+redis_client = InstrumentedRedis.from_url(Config.REDIS_URL)
+token_blocklist = redis_client
+
+_worker_client: Optional[redis_sync.Redis] = None
+
+
+def worker_redis() -> redis_sync.Redis:
+    """Synchronous client for Celery tasks, which have no long-lived event loop to share."""
+    global _worker_client
+    if _worker_client is None:
+        _worker_client = redis_sync.Redis.from_url(Config.REDIS_URL)
+    return _worker_client
+
+
+class BlocklistMirror:
+    """In-process copy of the revoked jti set, kept current through Redis pub/sub.
+
+    The set only ever holds tokens revoked within the last JTI_EXPIRY seconds,
+    so it stays small. Until the subscription is up (or after it drops) callers
+    are told the mirror is not synced and should ask Redis directly.
+    """
+
+    def __init__(self) -> None:
+        self.revoked: Dict[str, float] = {}
+        self.synced = False
+        self._task: Optional[asyncio.Task] = None
+
+    def ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def add(self, jti: str, expires_at: float) -> None:
+        self.revoked[jti] = expires_at
+
+    def contains(self, jti: str) -> bool:
+        expires_at = self.revoked.get(jti)
+        if expires_at is None:
+            return False
+
+        if expires_at <= time.time():
+            del self.revoked[jti]
+            return False
+
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            pubsub = redis_client.pubsub()
+            try:
+                # subscribe before taking the snapshot so nothing revoked in between is missed
+                await pubsub.subscribe(BLOCKLIST_CHANNEL)
+                await self._load_snapshot()
+                self.synced = True
+
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    jti, _, expires_at = message["data"].decode().partition(":")
+                    self.add(jti, float(expires_at))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.exception(e)
+            finally:
+                self.synced = False
+                await pubsub.aclose()
+
+            await asyncio.sleep(1)
+
+    async def _load_snapshot(self) -> None:
+        now = time.time()
+        await redis_client.zremrangebyscore(BLOCKLIST_KEY, "-inf", now)
+        entries = await redis_client.zrangebyscore(BLOCKLIST_KEY, now, "+inf", withscores=True)
+
+        self.revoked = {jti.decode(): expires_at for jti, expires_at in entries}
+
+
+blocklist_mirror = BlocklistMirror()
+
+
 async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(
-        name=jti,
-        value="",
-        ex=JTI_EXPIRY
-    )
+    expires_at = time.time() + JTI_EXPIRY
+    blocklist_mirror.add(jti, expires_at)
+
+    async with token_blocklist.pipeline(transaction=False) as pipe:
+        pipe.set(name=jti, value="", ex=JTI_EXPIRY)
+        pipe.zadd(BLOCKLIST_KEY, {jti: expires_at})
+        pipe.publish(BLOCKLIST_CHANNEL, f"{jti}:{expires_at}")
+        await pipe.execute()
 
 async def token_in_blocklist(jti: str) -> bool:
+    blocklist_mirror.ensure_started()
+
+    if blocklist_mirror.synced:
+        return blocklist_mirror.contains(jti)
+
     jti = await token_blocklist.get(jti)
 
-    return jti is not None
\ No newline at end of file
+    return jti is not None
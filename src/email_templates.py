@@ -0,0 +1,80 @@
+"""Jinja email templates, compiled once per process.
+
+Templates live in src/templates/email/<locale>/<template id>.html and set a
+top-level `subject`. A locale without its own copy of a template falls back to
+the base language (fr-CA -> fr) and then to EMAIL_DEFAULT_LOCALE.
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, Template, TemplateNotFound, select_autoescape
+
+from src.config import Config
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+
+_env: Optional[Environment] = None
+
+
+def _environment() -> Environment:
+    global _env
+    if _env is None:
+        _env = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            autoescape=select_autoescape(["html"]),
+            # templates only change with a deploy, so skip the mtime checks and never evict
+            auto_reload=False,
+            cache_size=-1,
+        )
+    return _env
+
+
+def warm_templates() -> int:
+    """Compile every email template now instead of on first use."""
+    env = _environment()
+    names = env.list_templates(filter_func=lambda name: name.startswith("email/"))
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+@lru_cache(maxsize=None)
+def available_locales() -> List[str]:
+    return sorted(p.name for p in (TEMPLATE_DIR / "email").iterdir() if p.is_dir())
+
+
+def preferred_locale(accept_language: Optional[str]) -> str:
+    """Best available locale for an Accept-Language header."""
+    locales = available_locales()
+    ranked = []
+    for part in (accept_language or "").split(","):
+        tag, _, q = part.strip().partition(";q=")
+        try:
+            ranked.append((float(q) if q else 1.0, tag.strip().lower()))
+        except ValueError:
+            continue
+
+    for _, tag in sorted(ranked, key=lambda item: -item[0]):
+        for candidate in (tag, tag.split("-")[0]):
+            if candidate in locales:
+                return candidate
+    return Config.EMAIL_DEFAULT_LOCALE
+
+
+def _template(template_id: str, locale: str) -> Tuple[Template, str]:
+    env = _environment()
+    for candidate in dict.fromkeys((locale, locale.split("-")[0], Config.EMAIL_DEFAULT_LOCALE)):
+        try:
+            return env.get_template(f"email/{candidate}/{template_id}.html"), candidate
+        except TemplateNotFound:
+            continue
+    raise TemplateNotFound(template_id)
+
+
+def render_email(template_id: str, context: dict, locale: Optional[str] = None) -> Tuple[str, str]:
+    """Render a template to (subject, html body)."""
+    template, locale = _template(template_id, (locale or Config.EMAIL_DEFAULT_LOCALE).lower())
+    module = template.make_module({**context, "locale": locale})
+
+    return module.subject, str(module)
@@ -35,6 +35,24 @@ class DataAlreadyExistError(BooklyException):
     """Data already exists"""
     pass
 
+class InvalidCursor(BooklyException):
+    """User provided a malformed or tampered pagination cursor"""
+    pass
+
+class InvalidFieldSelection(BooklyException):
+    """User asked for a field that list endpoints do not expose"""
+    pass
+
+class RateLimitExceeded(BooklyException):
+    """User sent more requests than the route allows"""
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+class ServiceBusyError(BooklyException):
+    """Server is at capacity for this kind of work and shed the request"""
+    pass
+
 def create_exception_handler(status_code:int, initial_detail: Any) -> Callable[[Request, Exception], JSONResponse]:
     async def exception_handler(request: Request, exc: BooklyException):
         return JSONResponse(
@@ -93,6 +111,54 @@ def register_all_errors(app: FastAPI):
         )
     )
 
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid pagination cursor",
+                "error_code": "invalid_cursor",
+                "resolution": "Use the next_cursor value returned by the previous page"
+            }
+        )
+    )
+
+    app.add_exception_handler(
+        InvalidFieldSelection,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid fields parameter",
+                "error_code": "invalid_fields",
+                "resolution": "Pass a comma-separated list of book fields, e.g. fields=uid,title"
+            }
+        )
+    )
+
+    app.add_exception_handler(
+        ServiceBusyError,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Server is busy",
+                "error_code": "service_busy",
+                "resolution": "Please retry in a moment"
+            }
+        )
+    )
+
+    @app.exception_handler(RateLimitExceeded)
+    async def rate_limit_exceeded(request: Request, exc: RateLimitExceeded):
+        return JSONResponse(
+            content={
+                "message": "Too many requests",
+                "error_code": "rate_limited",
+                "resolution": f"Retry in {exc.retry_after} seconds"
+            },
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
     @app.exception_handler(500)
     async def internal_server_error(request, exec):
         return JSONResponse(
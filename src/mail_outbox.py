@@ -0,0 +1,113 @@
+"""Redis list of emails waiting to be sent in batches by the drain_email_outbox task.
+
+The web process appends with the async client; the Celery worker claims
+batches with a synchronous one.
+"""
+import json
+import logging
+from typing import List, Optional
+
+from src.config import Config
+from src.db.redis import redis_client, worker_redis
+
+OUTBOX_KEY = "mail:outbox"
+# Set while a drain task is queued, so a burst of signups schedules one drain, not one per email
+DRAIN_SCHEDULED_KEY = "mail:outbox:scheduled"
+# A drain moves each batch into its own processing list and holds a lease on it
+# while sending, so a worker killed mid-batch loses nothing
+PROCESSING_KEY = "mail:outbox:processing:{}"
+LEASE_KEY = "mail:outbox:lease:{}"
+DRAINS_KEY = "mail:outbox:drains"
+
+CLAIM = worker_redis().register_script(
+    """
+    local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+    if #items == 0 then
+        return items
+    end
+    redis.call('RPUSH', KEYS[2], unpack(items))
+    redis.call('LTRIM', KEYS[1], #items, -1)
+    redis.call('SET', KEYS[3], 1, 'EX', ARGV[2])
+    redis.call('SADD', KEYS[4], ARGV[3])
+    return items
+    """
+)
+
+# Moves a lapsed drain's processing list back to the head of the outbox, keeping its order
+RECOVER = worker_redis().register_script(
+    """
+    if redis.call('EXISTS', KEYS[3]) == 1 then
+        return 0
+    end
+    local moved = 0
+    while redis.call('RPOPLPUSH', KEYS[1], KEYS[2]) do
+        moved = moved + 1
+    end
+    redis.call('SREM', KEYS[4], ARGV[1])
+    return moved
+    """
+)
+
+
+async def push(recipients: List[str], template: str, context: dict, locale: Optional[str] = None) -> bool:
+    """Queue one email. Returns True when the caller must schedule a drain.
+
+    Only the template id and its context are stored; the worker renders them.
+    """
+    data = json.dumps({"recipients": recipients, "template": template, "context": context, "locale": locale})
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.rpush(OUTBOX_KEY, data)
+        # expires on its own in case the scheduled task is lost
+        pipe.set(DRAIN_SCHEDULED_KEY, 1, nx=True, ex=Config.MAIL_BATCH_DELAY_MAX)
+        _, scheduled = await pipe.execute()
+
+    return bool(scheduled)
+
+
+def clear_scheduled() -> None:
+    """Called by the drain before it claims anything, so later pushes schedule a new drain."""
+    worker_redis().delete(DRAIN_SCHEDULED_KEY)
+
+
+def claim_batch(drain_id: str, size: int) -> List[dict]:
+    """Move up to `size` emails into this drain's processing list and return them.
+
+    They stay there until `ack`; if the drain dies first, `recover_abandoned`
+    puts them back in the outbox once its lease lapses.
+    """
+    raw = CLAIM(
+        keys=[OUTBOX_KEY, PROCESSING_KEY.format(drain_id), LEASE_KEY.format(drain_id), DRAINS_KEY],
+        args=[size, Config.MAIL_OUTBOX_LEASE_TTL, drain_id],
+    )
+
+    batch = []
+    for item in raw:
+        try:
+            batch.append(json.loads(item))
+        except ValueError:
+            logging.error("dropping malformed outbox entry: %r", item[:200])
+    return batch
+
+
+def ack(drain_id: str) -> None:
+    """The claimed batch has been sent or handed to send_email; forget it."""
+    with worker_redis().pipeline(transaction=True) as pipe:
+        pipe.delete(PROCESSING_KEY.format(drain_id), LEASE_KEY.format(drain_id))
+        pipe.srem(DRAINS_KEY, drain_id)
+        pipe.execute()
+
+
+def recover_abandoned() -> int:
+    """Return batches claimed by drains whose lease lapsed to the front of the outbox."""
+    client = worker_redis()
+    recovered = 0
+    for drain_id in client.smembers(DRAINS_KEY):
+        drain_id = drain_id.decode()
+        recovered += RECOVER(
+            keys=[PROCESSING_KEY.format(drain_id), OUTBOX_KEY, LEASE_KEY.format(drain_id), DRAINS_KEY],
+            args=[drain_id],
+        )
+    if recovered:
+        logging.warning("requeued %d emails from abandoned outbox drains", recovered)
+    return recovered
@@ -0,0 +1,95 @@
+"""Prometheus metrics shared by the API workers and the Celery producers.
+
+With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory before the workers start; each process then writes its samples there
+and /metrics aggregates them. Gauges use "livesum" so a dead worker's values
+drop out. Without the variable, /metrics reports the current process only.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by templated route",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["engine"],
+    buckets=FAST_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Database connections currently checked out, by engine (primary, replica0, ...)",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis round-trip time by command (pipelines count as PIPELINE)",
+    ["command"],
+    buckets=FAST_BUCKETS,
+)
+
+CELERY_ENQUEUE_DURATION = Histogram(
+    "celery_enqueue_duration_seconds",
+    "Time to publish a task to the broker",
+    ["task"],
+    buckets=FAST_BUCKETS,
+)
+
+BOOK_CACHE_LOOKUPS = Counter(
+    "book_response_cache_lookups",
+    "Book response cache lookups by result (hit or miss)",
+    ["result"],
+)
+BOOK_CACHE_LOCK_WAITS = Counter(
+    "book_response_cache_lock_waits",
+    "Cache misses that waited for another worker to fill the entry",
+)
+BOOK_CACHE_ERRORS = Counter(
+    "book_response_cache_errors",
+    "Redis errors the book response cache fell back from",
+)
+
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "bcrypt jobs running or queued on the hasher pool",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected",
+    "bcrypt jobs shed because the hasher pool was full",
+)
+
+
+def render_metrics():
+    """Exposition body and content type for the /metrics endpoint."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry), CONTENT_TYPE_LATEST
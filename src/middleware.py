@@ -1,35 +1,285 @@
-from fastapi import FastAPI, status
-from fastapi.requests import Request
-from fastapi.responses import JSONResponse
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.trustedhost import TrustedHostMiddleware
-import time
+from fastapi import FastAPI
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
+import random
+import time
+import uuid
 
+from src.access_log import access_logger, request_id_var, setup_access_log
+from src.config import Config
+from src.db.profiling import profile_queries, warn_if_suspicious
+from src.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+# replaced by the structured access log below
 logger = logging.getLogger("uvicorn.access")
 logger.disabled = True
 
+# The middlewares below are plain ASGI callables rather than @app.middleware("http")
+# functions: those run through BaseHTTPMiddleware, which puts every request in an
+# extra task and re-streams every response body.
+
+
+def _request_id(headers: Headers) -> str:
+    incoming = headers.get(Config.REQUEST_ID_HEADER)
+    # accept a caller's id only if it is short and printable enough to log safely
+    if incoming and len(incoming) <= 128 and incoming.isprintable():
+        return incoming
+    return uuid.uuid4().hex
+
+
+def _should_log(status_code: int, duration_ms: float) -> bool:
+    if status_code >= 400 or duration_ms >= Config.ACCESS_LOG_SLOW_MS:
+        return True
+    return random.random() < Config.ACCESS_LOG_SAMPLE_RATE
+
+
+def _route_template(scope: Scope) -> str:
+    # the templated path keeps label cardinality bounded; unmatched URLs share one label
+    route = scope.get("route")
+    return getattr(route, "path", "<unmatched>")
+
+
+def _log_access(scope: Scope, headers: Headers, status_code: int, duration_ms: float, request_id: str) -> None:
+    client = scope.get("client")
+    access_logger.info(
+        "request",
+        extra={"fields": {
+            "request_id": request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": _route_template(scope),
+            "status": status_code,
+            "duration_ms": round(duration_ms, 3),
+            "client": f"{client[0]}:{client[1]}" if client else None,
+            "user_agent": headers.get("user-agent"),
+        }},
+    )
+
+
+class AccessLogMiddleware:
+    """Request ids, latency metrics and the access log, timed until the last body chunk is sent."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.request_id_header = Config.REQUEST_ID_HEADER.lower().encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        request_id = _request_id(headers)
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_var.set(request_id)
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(scope["method"])
+        in_flight.inc()
+        start = time.perf_counter_ns()
+        status_code = 500
+        finished = False
+
+        def finish(status: int) -> None:
+            nonlocal finished
+            finished = True
+            duration_ms = (time.perf_counter_ns() - start) / 1e6
+            HTTP_REQUEST_DURATION.labels(scope["method"], _route_template(scope), str(status)).observe(duration_ms / 1000)
+            if Config.ACCESS_LOG_ENABLED and _should_log(status, duration_ms):
+                _log_access(scope, headers, status, duration_ms, request_id)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", []).append((self.request_id_header, request_id.encode()))
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish(status_code)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            # a failing background task raises after the response went out; it was already counted
+            if not finished:
+                finish(500)
+            raise
+        finally:
+            in_flight.dec()
+            request_id_var.reset(token)
+
+
+class SQLProfilingMiddleware:
+    """Server-Timing header with the request's query count and DB time, plus N+1 warnings."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter_ns()
+        with profile_queries() as stats:
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    total_ms = (time.perf_counter_ns() - start) / 1e6
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", f"{stats.server_timing()}, app;dur={total_ms:.2f}"
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+        warn_if_suspicious(stats, f"{scope['method']} {_route_template(scope)}")
+
+
+def _csv(value: str) -> list:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class HostAndCORSMiddleware:
+    """Trusted-host check and CORS in one pass over the request headers.
+
+    Host and origin allow-lists are turned into sets (plus suffixes for
+    "*.example.com" hosts) once at start-up, so each request costs a couple of
+    set lookups.
+
+    CORS follows Starlette's CORSMiddleware with one difference: a "*" origin
+    never has the request Origin echoed back. Wildcard-matched origins get
+    "Access-Control-Allow-Origin: *" without Allow-Credentials, which browsers
+    refuse for credentialed requests. Only origins listed by name may send
+    credentials.
+    """
+
+    PREFLIGHT_MAX_AGE = "600"
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allowed_hosts: list,
+        allow_origins: list,
+        allow_methods: list,
+        allow_headers: list,
+        allow_credentials: bool = False,
+    ) -> None:
+        self.app = app
+        self.any_host = "*" in allowed_hosts
+        self.hosts = frozenset(h.lower() for h in allowed_hosts if not h.startswith("*"))
+        self.host_suffixes = tuple(h[1:].lower() for h in allowed_hosts if h.startswith("*."))
+
+        self.any_origin = "*" in allow_origins
+        self.origins = frozenset(o for o in allow_origins if o != "*")
+        self.any_method = "*" in allow_methods
+        self.methods = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT") if self.any_method else tuple(allow_methods)
+        self.methods_header = ", ".join(self.methods)
+        self.any_header = "*" in allow_headers
+        self.headers = frozenset(h.lower() for h in allow_headers) | {"accept", "accept-language", "content-language", "content-type"}
+        self.credentials = allow_credentials
+
+    def _host_allowed(self, host: str) -> bool:
+        if self.any_host:
+            return True
+        host = host.split(":")[0].lower()
+        return host in self.hosts or host.endswith(self.host_suffixes)
+
+    def _origin_allowed(self, origin: str) -> bool:
+        return self.any_origin or origin in self.origins
+
+    def _origin_headers(self, origin: str) -> dict:
+        if origin in self.origins:
+            headers = {"Access-Control-Allow-Origin": origin}
+            if self.credentials:
+                headers["Access-Control-Allow-Credentials"] = "true"
+            return headers
+        if self.any_origin:
+            return {"Access-Control-Allow-Origin": "*"}
+        return {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        if not self._host_allowed(headers.get("host", "")):
+            response = PlainTextResponse("Invalid host header", status_code=400)
+            return await response(scope, receive, send)
+
+        origin = headers.get("origin")
+        if scope["type"] != "http" or origin is None:
+            return await self.app(scope, receive, send)
+
+        if scope["method"] == "OPTIONS" and "access-control-request-method" in headers:
+            return await self._preflight(scope, receive, send, headers, origin)
+
+        return await self._simple(scope, receive, send, headers, origin)
+
+    async def _preflight(self, scope: Scope, receive: Receive, send: Send, headers: Headers, origin: str) -> None:
+        requested_method = headers["access-control-request-method"]
+        requested_headers = headers.get("access-control-request-headers")
+
+        response_headers = {
+            "Access-Control-Allow-Methods": self.methods_header,
+            "Access-Control-Max-Age": self.PREFLIGHT_MAX_AGE,
+            "Vary": "Origin",
+        }
+        origin_allowed = self._origin_allowed(origin)
+        response_headers.update(self._origin_headers(origin))
+        if self.any_header and requested_headers:
+            response_headers["Access-Control-Allow-Headers"] = requested_headers
+        else:
+            response_headers["Access-Control-Allow-Headers"] = ", ".join(sorted(self.headers))
+
+        failures = []
+        if not origin_allowed:
+            failures.append("origin")
+        if requested_method not in self.methods:
+            failures.append("method")
+        if requested_headers and not self.any_header:
+            if any(h.strip().lower() not in self.headers for h in requested_headers.split(",")):
+                failures.append("headers")
+
+        if failures:
+            response = PlainTextResponse("Disallowed CORS " + ", ".join(failures), status_code=400, headers=response_headers)
+        else:
+            response = PlainTextResponse("OK", status_code=200, headers=response_headers)
+        await response(scope, receive, send)
+
+    async def _simple(self, scope: Scope, receive: Receive, send: Send, headers: Headers, origin: str) -> None:
+        if not self._origin_allowed(origin):
+            return await self.app(scope, receive, send)
+
+        cors_headers = self._origin_headers(origin)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                response_headers.update(cors_headers)
+                # the answer depends on the Origin whenever an allow-list is configured
+                if self.origins:
+                    response_headers.add_vary_header("Origin")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
 
 def register_middleware(app: FastAPI):
-    @app.middleware("http")
-    async def custom_logging(request: Request, call_next):
-        start_time = time.time()
+    if Config.ACCESS_LOG_ENABLED:
+        setup_access_log()
+
+    # add_middleware wraps what is already there, so the last one added runs first
+    if Config.SQL_PROFILING:
+        app.add_middleware(SQLProfilingMiddleware)
 
-        response = await call_next(request)
-        processing_time = time.time() - start_time
-        message = f"{request.client.host}:{request.client.port} - {request.method} - {request.url.path} - {response.status_code} completed after {processing_time}s"
-        print(message)
-        return response
+    app.add_middleware(AccessLogMiddleware)
 
     app.add_middleware(
-        CORSMiddleware,
-        allow_origins="*",
-        allow_methods="*",
-        allow_headers="*",
+        HostAndCORSMiddleware,
+        allowed_hosts=_csv(Config.ALLOWED_HOSTS),
+        allow_origins=_csv(Config.CORS_ALLOW_ORIGINS),
+        allow_methods=["*"],
+        allow_headers=["*"],
         allow_credentials=True,
     )
-
-    app.add_middleware(TrustedHostMiddleware, allowed_hosts=["localhost", '127.0.0.1'])
     # @app.middleware('http')
     # async def authorization(request: Request, call_next):
     #     if not "Authorization" in request.headers:
@@ -0,0 +1,48 @@
+import logging
+from typing import List, Optional
+
+from src.celery_tasks import queue_email
+from src.config import Config
+from src.db.redis import redis_client
+
+
+class NotificationService:
+    """The one way request handlers send mail: enqueue only, never SMTP.
+
+    Each notification carries an idempotency key. The first enqueue with a key
+    claims it in Redis for NOTIFICATION_IDEMPOTENCY_TTL seconds, and any repeat
+    within that window (a retried request, a double submit) is dropped.
+    """
+
+    def _key(self, template: str, idempotency_key: str) -> str:
+        return f"notification:{template}:{idempotency_key}"
+
+    async def send_email(
+        self,
+        template: str,
+        recipients: List[str],
+        context: dict,
+        locale: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> bool:
+        """Queue a templated email, rendered later by the worker.
+
+        Returns False when the same notification was already queued.
+        """
+        key = self._key(template, idempotency_key) if idempotency_key else None
+        if key and not await redis_client.set(key, 1, nx=True, ex=Config.NOTIFICATION_IDEMPOTENCY_TTL):
+            return False
+
+        try:
+            await queue_email(recipients, template, context, locale)
+        except Exception:
+            # give the key back so the caller's retry is not swallowed
+            if key:
+                await redis_client.delete(key)
+            raise
+
+        logging.debug("queued %s email for %d recipients", template, len(recipients))
+        return True
+
+
+notification_service = NotificationService()
@@ -0,0 +1,134 @@
+import logging
+import math
+from typing import Optional, Tuple
+
+from fastapi import Request
+
+from src.cache import TTLCache
+from src.config import Config
+from src.db.redis import redis_client
+from src.errors import RateLimitExceeded
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# GCRA: the key holds the theoretical arrival time (TAT) in ms. Taking `cost`
+# tokens pushes it `cost * interval` ahead; the request fits while the new TAT
+# stays within `burst` ms of now. Uses the server clock, so workers need not agree.
+GCRA = redis_client.register_script(
+    """
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+    local interval = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+
+    local tat = tonumber(redis.call('GET', KEYS[1])) or now
+    if tat < now then tat = now end
+    local new_tat = tat + cost * interval
+    local allow_at = new_tat - burst
+    if now < allow_at then
+        return {0, math.ceil(allow_at - now)}
+    end
+
+    redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+    return {1, 0}
+    """
+)
+
+
+def parse_rate(rate: str) -> Optional[Tuple[int, int]]:
+    """"5/minute" -> (5, 60); an empty string means no limit."""
+    if not rate:
+        return None
+    count, _, period = rate.partition("/")
+    return int(count), PERIODS[period.strip()]
+
+
+def client_ip(request: Request) -> str:
+    if Config.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            # entries left of the ones our proxies appended are whatever the client sent
+            hops = [hop.strip() for hop in forwarded.split(",")]
+            return hops[-min(Config.RATE_LIMIT_PROXY_HOPS, len(hops))]
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    """GCRA limits kept in Redis, with tokens leased in batches to a local bucket.
+
+    For limits high enough to spare them, a worker takes up to
+    RATE_LIMIT_LEASE_SIZE tokens per Redis call and spends them locally, so most
+    allowed requests never leave the process. Leased tokens are charged in
+    Redis up front, so leasing never admits more than the limit; it can only
+    under-admit. Tokens a worker leases but does not spend within
+    RATE_LIMIT_LEASE_TTL are lost, and each worker can hold back up to
+    RATE_LIMIT_LEASE_SIZE tokens that other workers are refused, so a larger
+    size or longer TTL means more callers rejected before their real limit.
+    Low limits (login attempts) lease one token at a time and stay exact. If
+    Redis is unreachable, requests are let through.
+    """
+
+    def __init__(self) -> None:
+        self.leases = TTLCache(maxsize=Config.RATE_LIMIT_LOCAL_KEYS, ttl=Config.RATE_LIMIT_LEASE_TTL)
+
+    def _lease_size(self, limit: int) -> int:
+        return max(1, min(Config.RATE_LIMIT_LEASE_SIZE, limit // 10))
+
+    async def _take(self, key: str, limit: int, period: int, cost: int) -> Tuple[bool, int]:
+        interval = period * 1000 / limit
+        allowed, retry_after_ms = await GCRA(keys=[key], args=[interval, period * 1000, cost])
+        return bool(allowed), int(retry_after_ms)
+
+    async def acquire(self, key: str, limit: int, period: int) -> None:
+        """Take one token for `key` or raise RateLimitExceeded."""
+        lease = self.leases.get(key)
+        if lease:
+            lease[0] -= 1
+            if lease[0] <= 0:
+                self.leases.pop(key)
+            return
+
+        lease_size = self._lease_size(limit)
+        try:
+            allowed, retry_after_ms = await self._take(key, limit, period, lease_size)
+            if not allowed and lease_size > 1:
+                # not enough for a whole lease; one token may still be there
+                lease_size = 1
+                allowed, retry_after_ms = await self._take(key, limit, period, 1)
+        except Exception as e:
+            logging.exception(e)
+            return
+
+        if not allowed:
+            raise RateLimitExceeded(retry_after=max(1, math.ceil(retry_after_ms / 1000)))
+
+        if lease_size > 1:
+            self.leases.set(key, [lease_size - 1])
+
+
+rate_limiter = RateLimiter()
+
+
+class RateLimit:
+    """Per-route limit on a client IP or on an identity the route passes in.
+
+    As a dependency it limits by IP:
+
+        @router.post("/login", dependencies=[Depends(RateLimit("login", Config.RATE_LIMIT_LOGIN_IP))])
+
+    For per-account limits, call `hit` with the account once the route has it.
+    """
+
+    def __init__(self, scope: str, rate: str) -> None:
+        self.scope = scope
+        self.rate = parse_rate(rate)
+
+    async def hit(self, identity: str) -> None:
+        if self.rate is None or not Config.RATE_LIMIT_ENABLED:
+            return
+        limit, period = self.rate
+        await rate_limiter.acquire(f"ratelimit:{self.scope}:{identity}", limit, period)
+
+    async def __call__(self, request: Request) -> None:
+        await self.hit(client_ip(request))
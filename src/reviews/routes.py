@@ -1,17 +1,49 @@
-from fastapi import APIRouter, Depends
+import uuid
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.auth.dependencies import get_current_user
-from src.db.main import get_session
-from src.db.models import User
-from src.reviews.schemas import ReviewCreateModel
+from src.auth.dependencies import RoleChecker, get_current_user
+from src.config import Config
+from src.db.main import get_read_session, get_session
+from src.auth.schemas import UserPrincipal
+from src.reviews.schemas import ReviewCreateModel, ReviewPageModel
 from src.reviews.service import ReviewService
+from src.serialization import dump_reviews_page
 
 review_router = APIRouter()
 review_service = ReviewService()
+role_checker = Depends(RoleChecker(['admin', 'user']))
 
 @review_router.post('/book/{book_uid}')
-async def add_review_to_book(book_uid: str,  review_data: ReviewCreateModel, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
-    new_review = await review_service.add_review_to_book(current_user.email, book_uid, review_data, session)
+async def add_review_to_book(book_uid: uuid.UUID,  review_data: ReviewCreateModel, current_user: UserPrincipal = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+    new_review = await review_service.add_review_to_book(current_user.uid, book_uid, review_data, session)
 
     return new_review
+
+
+
+@review_router.get('/book/{book_uid}', response_model=ReviewPageModel, dependencies=[role_checker])
+async def get_book_reviews(
+    book_uid: uuid.UUID,
+    limit: int = Query(default=Config.REVIEWS_PAGE_SIZE, ge=1, le=Config.REVIEWS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Literal["recent", "rating"] = "recent",
+    session: AsyncSession = Depends(get_read_session),
+):
+    reviews, next_cursor = await review_service.get_book_reviews(book_uid, session, limit=limit, cursor=cursor, sort=sort)
+
+    return Response(content=dump_reviews_page(reviews, next_cursor), media_type="application/json")
+
+
+@review_router.get('/user/{user_uid}', response_model=ReviewPageModel, dependencies=[role_checker])
+async def get_user_reviews(
+    user_uid: uuid.UUID,
+    limit: int = Query(default=Config.REVIEWS_PAGE_SIZE, ge=1, le=Config.REVIEWS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Literal["recent", "rating"] = "recent",
+    session: AsyncSession = Depends(get_read_session),
+):
+    reviews, next_cursor = await review_service.get_user_reviews(user_uid, session, limit=limit, cursor=cursor, sort=sort)
+
+    return Response(content=dump_reviews_page(reviews, next_cursor), media_type="application/json")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import uuid
 from pydantic import BaseModel, Field
 
@@ -13,6 +13,10 @@ class ReviewModel(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class ReviewPageModel(BaseModel):
+    items: List[ReviewModel]
+    next_cursor: Optional[str] = None
+
 class ReviewCreateModel(BaseModel):
     rating: int = Field(lt=5)
     review_text: str
\ No newline at end of file
@@ -1,35 +1,77 @@
 import logging
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
 from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlmodel import desc, select
+from src.config import Config
 from src.db.models import Review
-from src.auth.service import UserService
-from src.books.service import BookService
+from src.db.pagination import decode_cursor, encode_cursor
+from src.books.cache import book_response_cache
+from src.books.ratings import apply_review
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.reviews.schemas import ReviewCreateModel
 
-user_service = UserService()
-book_service = BookService()
+# sort name -> (key column, cursor type, key of a loaded Review)
+REVIEW_SORTS = {
+    "recent": (Review.created_at, datetime.fromisoformat, lambda r: r.created_at),
+    "rating": (Review.rating, int, lambda r: r.rating),
+}
 
 class ReviewService:
-    async def add_review_to_book(self, user_email:str, book_uid, review_data: ReviewCreateModel, session: AsyncSession):
-        try:
-            book = await book_service.get_book(book_uid, session)
-            user = await user_service.get_user_by_email(user_email, session)
+    async def _get_reviews_page(self, condition, session: AsyncSession, limit: int, cursor: Optional[str], sort: str) -> Tuple[List[Review], Optional[str]]:
+        key, key_type, key_of = REVIEW_SORTS[sort]
+        statement = select(Review).where(condition).order_by(desc(key), desc(Review.uid))
+
+        if cursor:
+            value, uid = decode_cursor(cursor, key_type, uuid.UUID)
+            statement = statement.where(tuple_(key, Review.uid) < tuple_(value, uid))
+
+        result = await session.exec(statement.limit(limit + 1))
+        reviews = result.all()
+
+        next_cursor = None
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            next_cursor = encode_cursor(key_of(reviews[-1]), reviews[-1].uid)
+
+        return reviews, next_cursor
 
-            review_data_dict = review_data.model_dump()
-            new_review = Review(**review_data_dict)
+    async def get_book_reviews(self, book_uid: uuid.UUID, session: AsyncSession, limit: int = Config.REVIEWS_PAGE_SIZE, cursor: Optional[str] = None, sort: str = "recent"):
+        """Fetch one page of a book's reviews and the cursor for the next page."""
+        return await self._get_reviews_page(Review.book_uid == book_uid, session, limit, cursor, sort)
 
-            new_review.user = user
+    async def get_user_reviews(self, user_uid: uuid.UUID, session: AsyncSession, limit: int = Config.REVIEWS_PAGE_SIZE, cursor: Optional[str] = None, sort: str = "recent"):
+        """Fetch one page of a user's reviews and the cursor for the next page."""
+        return await self._get_reviews_page(Review.user_uid == user_uid, session, limit, cursor, sort)
 
-            if not book:
+    async def add_review_to_book(self, user_uid, book_uid, review_data: ReviewCreateModel, session: AsyncSession):
+        try:
+            book_uid = uuid.UUID(str(book_uid))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
+
+        try:
+            # the aggregate UPDATE doubles as the existence check, so neither the
+            # book nor the user has to be loaded first
+            if not await apply_review(book_uid, review_data.rating, session):
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
-            
-            new_review.book = book
-            
+
+            new_review = Review(**review_data.model_dump())
+            # set the keys rather than the relationships so the unloaded back-reference
+            # collections (user.reviews, book.reviews) are never touched
+            new_review.user_uid = user_uid
+            new_review.book_uid = book_uid
+
             session.add(new_review)
             await session.commit()
+            await book_response_cache.invalidate(book_uid)
 
             return new_review
+        except HTTPException:
+            raise
         except Exception as e:
             logging.exception(e)
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Oops ...something went wrong")
\ No newline at end of file
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Oops ...something went wrong")
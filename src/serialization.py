@@ -0,0 +1,84 @@
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence
+
+import orjson
+from pydantic import TypeAdapter
+
+from src.books.schemas import BOOK_LIST_FIELDS, BookDetailModel, BookModel, book_list_page_model
+from src.config import Config
+from src.db.models import Review
+from src.reviews.schemas import ReviewModel, ReviewPageModel
+
+# Column projections, computed once from the response schemas so the fast path
+# emits exactly the fields the pydantic path would
+BOOK_FIELDS = tuple(BookModel.model_fields)
+REVIEW_FIELDS = tuple(Review.model_fields)
+REVIEW_PAGE_FIELDS = tuple(ReviewModel.model_fields)
+
+
+def _project(obj, fields: Iterable[str]) -> dict:
+    return {name: getattr(obj, name) for name in fields}
+
+
+def _average_rating(book) -> Optional[float]:
+    return book.rating_sum / book.review_count if book.review_count else None
+
+
+def _book(book) -> dict:
+    row = _project(book, BOOK_FIELDS)
+    row["average_rating"] = _average_rating(book)
+    return row
+
+
+def _book_row(row, fields: Sequence[str]) -> dict:
+    """Pick a sparse fieldset out of a projected row."""
+    return {
+        name: _average_rating(row) if name == "average_rating" else getattr(row, name)
+        for name in fields
+    }
+
+
+def dump_books_page(rows: List, next_cursor: Optional[str], fields: Sequence[str] = BOOK_LIST_FIELDS) -> bytes:
+    items = [_book_row(row, fields) for row in rows]
+    if Config.FAST_SERIALIZATION:
+        # orjson writes UUID, date and datetime natively, in the same format as pydantic
+        return orjson.dumps({"items": items, "next_cursor": next_cursor})
+
+    page = book_list_page_model(tuple(fields)).model_validate({"items": items, "next_cursor": next_cursor})
+    return page.model_dump_json().encode()
+
+
+def dump_books(rows: List, fields: Sequence[str] = BOOK_LIST_FIELDS) -> bytes:
+    items = [_book_row(row, fields) for row in rows]
+    if Config.FAST_SERIALIZATION:
+        return orjson.dumps(items)
+
+    adapter = _book_items_adapter(tuple(fields))
+    return adapter.dump_json(adapter.validate_python(items))
+
+
+@lru_cache(maxsize=64)
+def _book_items_adapter(fields) -> TypeAdapter:
+    return TypeAdapter(book_list_page_model(fields).model_fields["items"].annotation)
+
+
+def dump_book(book, include_reviews: bool) -> bytes:
+    if Config.FAST_SERIALIZATION:
+        row = _book(book)
+        if include_reviews:
+            row["reviews"] = [_project(r, REVIEW_FIELDS) for r in book.reviews]
+        return orjson.dumps(row)
+
+    schema = BookDetailModel if include_reviews else BookModel
+    return schema.model_validate(book, from_attributes=True).model_dump_json().encode()
+
+
+def dump_reviews_page(reviews: List, next_cursor: Optional[str]) -> bytes:
+    if Config.FAST_SERIALIZATION:
+        return orjson.dumps({
+            "items": [_project(r, REVIEW_PAGE_FIELDS) for r in reviews],
+            "next_cursor": next_cursor,
+        })
+
+    page = ReviewPageModel.model_validate({"items": reviews, "next_cursor": next_cursor}, from_attributes=True)
+    return page.model_dump_json().encode()
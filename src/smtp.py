@@ -0,0 +1,242 @@
+"""Outbound SMTP for Celery workers: pooled persistent connections and pacing.
+
+Celery's prefork pool forks its children after this module is imported, so a
+pool notices when it is running in a new process and starts from scratch
+rather than reuse sockets that belong to the parent.
+"""
+import logging
+import os
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Iterator, List, Optional
+
+from jinja2 import TemplateError
+
+from src.config import Config
+from src.email_templates import render_email
+
+
+def build_message(recipients: List[str], subject: str, body: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((Config.MAIL_FROM_NAME, Config.MAIL_FROM))
+    message["To"] = ", ".join(recipients)
+    message["Subject"] = subject
+    message["Message-ID"] = make_msgid()
+    message.set_content(body, subtype="html")
+    return message
+
+
+def message_from(data: dict) -> EmailMessage:
+    """Build a message from an outbox payload: a template id and context, or a ready subject and body."""
+    if data.get("template"):
+        subject, body = render_email(data["template"], data.get("context") or {}, data.get("locale"))
+    else:
+        subject, body = data["subject"], data["body"]
+    return build_message(data["recipients"], subject, body)
+
+
+class _Connection:
+    def __init__(self, smtp: smtplib.SMTP) -> None:
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Keeps up to `size` authenticated SMTP connections open between sends.
+
+    A connection is replaced after `max_messages` sends, and one idle for
+    longer than `idle_timeout` is checked with NOOP before it is reused.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = False,
+        use_ssl: bool = False,
+        validate_certs: bool = True,
+        size: int = 2,
+        timeout: float = 30,
+        idle_timeout: float = 60,
+        max_messages: int = 100,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.validate_certs = validate_certs
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.connects = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _ssl_context(self) -> ssl.SSLContext:
+        context = ssl.create_default_context()
+        if not self.validate_certs:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        return context
+
+    def _connect(self) -> _Connection:
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=self._ssl_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls(context=self._ssl_context())
+        if self.username:
+            smtp.login(self.username, self.password)
+
+        self.connects += 1
+        return _Connection(smtp)
+
+    def _checkout(self) -> _Connection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            if time.monotonic() - conn.last_used < self.idle_timeout:
+                return conn
+            try:
+                if conn.smtp.noop()[0] == 250:
+                    return conn
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._discard(conn)
+
+    def _discard(self, conn: _Connection) -> None:
+        try:
+            conn.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.smtp.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[_Connection]:
+        if os.getpid() != self._pid:
+            # forked: the inherited sockets are the parent's, leave them alone
+            self._reset()
+
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError):
+                conn.smtp.close()
+                raise
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                # the server refused this message; the session itself is still good.
+                # SMTPException subclasses OSError, so this must come before the socket errors.
+                conn.last_used = time.monotonic()
+                self._idle.put(conn)
+                raise
+            except OSError:
+                conn.smtp.close()
+                raise
+            except BaseException:
+                self._discard(conn)
+                raise
+
+            conn.last_used = time.monotonic()
+            if conn.sent >= self.max_messages:
+                self._discard(conn)
+            else:
+                self._idle.put(conn)
+
+    def send(self, message: EmailMessage) -> None:
+        """Send one message, retrying once on a fresh connection if the pooled one went stale."""
+        for attempt in (1, 2):
+            try:
+                with self.connection() as conn:
+                    conn.smtp.send_message(message)
+                    conn.sent += 1
+                return
+            except smtplib.SMTPServerDisconnected:
+                if attempt == 2:
+                    raise
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart within one process (rate <= 0 disables it)."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def send_batch(messages: List[dict], pool: SMTPConnectionPool, limiter: RateLimiter) -> List[dict]:
+    """Send queued messages over pooled connections.
+
+    Returns the messages that hit a transient failure so the caller can retry
+    them; messages the server rejects outright are logged and dropped.
+    """
+    for index, data in enumerate(messages):
+        limiter.wait()
+        try:
+            pool.send(message_from(data))
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused) as e:
+            logging.error("email to %s rejected: %s", data["recipients"], e)
+        except TemplateError as e:
+            logging.error("email template %s failed to render: %s", data.get("template"), e)
+        except (smtplib.SMTPException, OSError) as e:
+            logging.warning("email batch interrupted after %d messages: %s", index, e)
+            return messages[index:]
+        except Exception:
+            # a malformed payload would fail the same way on every retry
+            logging.exception("dropping unsendable email %d of the batch", index)
+
+    return []
+
+
+smtp_pool = SMTPConnectionPool(
+    host=Config.MAIL_JET_SERVER_URL,
+    port=Config.MAIL_PORT,
+    username=Config.MAIL_JET_ACTIVATION_KEY if Config.USE_CREDENTIALS else None,
+    password=Config.MAIL_JET_SECRET_KEY if Config.USE_CREDENTIALS else None,
+    starttls=Config.MAIL_STARTTLS,
+    use_ssl=Config.MAIL_SSL_TLS,
+    validate_certs=Config.VALIDATE_CERTS,
+    size=Config.MAIL_SMTP_POOL_SIZE,
+    timeout=Config.MAIL_SMTP_TIMEOUT,
+    idle_timeout=Config.MAIL_SMTP_IDLE_TIMEOUT,
+    max_messages=Config.MAIL_SMTP_MAX_MESSAGES,
+)
+
+mail_rate_limiter = RateLimiter(Config.MAIL_RATE_LIMIT)
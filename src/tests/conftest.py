@@ -1,7 +1,10 @@
 from fastapi.testclient import TestClient
 from src.auth.dependencies import AccessTokenBearer, RefreshTokenBearer, RoleChecker
-from src.db.main import get_session
+from src.db.main import get_read_session, get_session
 from src import app
+from src.db.main import engine
+from src.db.profiling import capture_queries, instrument_engine
+from contextlib import contextmanager
 from unittest.mock import Mock
 import pytest
 
@@ -19,6 +22,7 @@ refresh_token_bearer = RefreshTokenBearer()
 role_checker = RoleChecker(['admin'])
 
 app.dependency_overrides[get_session] = get_mock_session
+app.dependency_overrides[get_read_session] = get_mock_session
 app.dependency_overrides[role_checker] = Mock()
 app.dependency_overrides[access_token_bearer] = Mock()
 app.dependency_overrides[refresh_token_bearer] = Mock()
@@ -37,4 +41,23 @@ def fake_book_service():
 
 @pytest.fixture
 def test_client():
-    return TestClient(app)
\ No newline at end of file
+    return TestClient(app)
+
+@pytest.fixture
+def query_budget():
+    """Assert that the wrapped calls issue at most `max_queries` statements:
+
+        with query_budget(2):
+            test_client.get(...)
+    """
+    instrument_engine(engine)
+
+    @contextmanager
+    def budget(max_queries: int, max_repeats: int = 1):
+        with capture_queries() as stats:
+            yield stats
+        assert stats.queries <= max_queries, f"{stats.queries} queries, budget {max_queries}: {list(stats.statements)}"
+        repeated = stats.repeated(max_repeats + 1)
+        assert not repeated, f"repeated statements (possible N+1): {repeated}"
+
+    return budget
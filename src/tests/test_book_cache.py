@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.books import cache
+from src.books.cache import LIST_VERSION_KEY, BookResponseCache, CachedResponse, book_version_key
+
+
+class FakeRedis:
+    """Just the commands BookResponseCache uses, over a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incr(self, key):
+        self.commands.append(key)
+
+    def expire(self, key, seconds):
+        pass
+
+    async def execute(self):
+        for key in self.commands:
+            self.redis.data[key] = str(int(self.redis.data.get(key, b"0")) + 1).encode()
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+
+    async def get_versioned(keys, args):
+        version = fake.data.get(keys[0], b"0")
+        return [version, fake.data.get(f"{args[0]}:v{version.decode()}")]
+
+    monkeypatch.setattr(cache, "redis_client", fake)
+    monkeypatch.setattr(cache, "GET_VERSIONED", get_versioned)
+    monkeypatch.setattr(cache.Config, "BOOKS_RESPONSE_CACHE_ENABLED", True)
+    return fake
+
+
+def entry(body: bytes) -> CachedResponse:
+    return CachedResponse(etag='"abc"', last_modified=datetime(2025, 1, 2, 3, 4, 5), body=body)
+
+
+def test_cached_response_round_trip():
+    original = entry(b'{"title": "multi\nline"}')
+
+    assert CachedResponse.loads(original.dumps()) == original
+    assert CachedResponse.loads(CachedResponse('"x"', None, b"").dumps()) == CachedResponse('"x"', None, b"")
+
+
+def test_invalidate_retires_filled_entries(redis):
+    response_cache = BookResponseCache()
+    key = "books:cache:detail:1:1"
+
+    async def scenario():
+        version, found = await response_cache.get(key, book_version_key(1))
+        assert found is None
+        await response_cache.fill(key, version, lambda: asyncio.sleep(0, entry(b"old")))
+
+        _, found = await response_cache.get(key, book_version_key(1))
+        assert found.body == b"old"
+
+        await response_cache.invalidate(1)
+        version, found = await response_cache.get(key, book_version_key(1))
+        assert found is None
+        assert version == "1"
+
+    asyncio.run(scenario())
+
+    assert redis.data[LIST_VERSION_KEY] == b"1"
+
+
+def test_concurrent_misses_render_once(redis):
+    response_cache = BookResponseCache()
+    renders = 0
+
+    async def render():
+        nonlocal renders
+        renders += 1
+        await asyncio.sleep(0.01)
+        return entry(b"page")
+
+    async def scenario():
+        return await asyncio.gather(*(response_cache.fill("books:cache:list:recent:20", "0", render) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert renders == 1
+    assert {r.body for r in results} == {b"page"}
+    assert "books:cache:list:recent:20:v0:lock" not in redis.data
@@ -0,0 +1,31 @@
+from unittest.mock import patch
+
+from src.cache import TTLCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(maxsize=2, ttl=10)
+
+    with patch("src.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+
+    with patch("src.cache.time.monotonic", return_value=109.0):
+        assert cache.get("a") == 1
+
+    with patch("src.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+        assert len(cache) == 0
@@ -0,0 +1,19 @@
+from src.email_templates import preferred_locale, render_email, warm_templates
+
+
+def test_every_template_compiles():
+    assert warm_templates() > 0
+
+
+def test_localized_variant_with_fallback_to_base_language():
+    subject, body = render_email("verify_email", {"link": "https://example.com/v?a=1&b=2"}, "fr-CA")
+
+    assert subject == "Vérifiez votre adresse e-mail"
+    assert 'lang="fr"' in body
+    assert "https://example.com/v?a=1&amp;b=2" in body
+
+
+def test_unknown_locale_falls_back_to_default():
+    assert preferred_locale("de-DE,fr;q=0.8") == "fr"
+    assert preferred_locale("de-DE") == "en"
+    assert render_email("welcome", {}, "de")[0] == "Hello!, Welcome"
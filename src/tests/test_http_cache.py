@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+from unittest.mock import Mock
+
+from src.http_cache import cache_headers, is_not_modified, make_etag
+
+
+def _request(**headers):
+    request = Mock()
+    request.headers = {k.replace("_", "-"): v for k, v in headers.items()}
+    return request
+
+
+def test_matching_etag_is_not_modified():
+    etag = make_etag("book", 1)
+
+    assert is_not_modified(_request(if_none_match=f'W/"other", {etag}'), etag)
+    assert not is_not_modified(_request(if_none_match='"other"'), etag)
+
+
+def test_if_modified_since_is_ignored_when_if_none_match_is_sent():
+    etag = make_etag("book", 1)
+    updated_at = datetime(2025, 8, 20, 20, 31, 59)
+    last_modified = cache_headers(etag, updated_at)["Last-Modified"]
+
+    assert is_not_modified(_request(if_modified_since=last_modified), etag, updated_at)
+    assert not is_not_modified(
+        _request(if_none_match='"other"', if_modified_since=last_modified), etag, updated_at
+    )
+
+
+def test_if_modified_since_ignores_sub_second_precision():
+    etag = make_etag("book", 1)
+    for updated_at in (
+        datetime(2025, 8, 20, 20, 31, 59, 750000),
+        datetime(2025, 8, 20, 20, 31, 59, 750000, tzinfo=timezone.utc),
+    ):
+        last_modified = cache_headers(etag, updated_at)["Last-Modified"]
+        assert is_not_modified(_request(if_modified_since=last_modified), etag, updated_at)
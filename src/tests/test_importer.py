@@ -0,0 +1,85 @@
+import asyncio
+import uuid
+
+from src.books.importer import BookImporter, BookImportReport, _lines, parse_csv, parse_ndjson
+
+
+async def _stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def _collect(rows) -> list:
+    async def drain():
+        return [row async for row in rows]
+
+    return asyncio.run(drain())
+
+
+def test_lines_split_across_chunk_boundaries():
+    # "é" is split between two chunks, and so is the second line
+    chunks = (b"\xef\xbb\xbfone\ntw", b"o \xc3", b"\xa9\nthree")
+
+    assert _collect(_lines(_stream(*chunks))) == ["one\n", "two é\n", "three"]
+
+
+def test_parse_csv_handles_quoted_newlines():
+    body = b'title,author\n"A\nlong title",Someone\nShort,Other\n'
+
+    assert _collect(parse_csv(_stream(body))) == [
+        (3, {"title": "A\nlong title", "author": "Someone"}),
+        (4, {"title": "Short", "author": "Other"}),
+    ]
+
+
+def test_parse_ndjson_flags_bad_lines():
+    body = b'{"title": "A"}\n\nnot json\n5\nnull\n'
+
+    rows = _collect(parse_ndjson(_stream(body)))
+
+    assert rows[0] == (1, {"title": "A"})
+    assert rows[1][0] == 3 and rows[1][1]["__error__"].startswith("invalid JSON")
+    assert rows[2] == (4, {"__error__": "expected a JSON object"})
+    assert rows[3] == (5, {"__error__": "expected a JSON object"})
+
+
+def test_to_records_reports_invalid_rows():
+    good = {
+        "title": "A", "author": "B", "publisher": "C", "published_date": "2020-01-02",
+        "page_count": 10, "language": "en",
+    }
+    batch = [
+        (1, good),
+        (2, {**good, "published_date": "02/01/2020"}),
+        (3, {"__error__": "invalid JSON: boom"}),
+        (4, [1, 2]),
+        (5, {"title": "only a title"}),
+    ]
+    report = BookImportReport()
+
+    records, lines = BookImporter()._to_records(batch, uuid.uuid4(), report)
+
+    assert lines == [1]
+    assert records[0][1] == "A"
+    assert report.failed == 4
+    assert [e["line"] for e in report.errors] == [2, 3, 4, 5]
+    assert report.errors[0]["errors"] == ["published_date: expected YYYY-MM-DD"]
+    assert report.errors[2]["errors"] == ["expected a JSON object"]
+
+
+def test_report_merge_truncates_errors(monkeypatch):
+    monkeypatch.setattr("src.books.importer.Config.BOOK_IMPORT_MAX_ERRORS", 2)
+    report = BookImportReport()
+    report.add_error(1, ["bad"])
+
+    report.merge({
+        "inserted": 5, "failed": 2, "errors_truncated": False,
+        "errors": [{"line": 7, "errors": ["bad"]}, {"line": 8, "errors": ["bad"]}],
+    })
+
+    assert report.as_dict() == {
+        "inserted": 5,
+        "failed": 3,
+        "errors": [{"line": 1, "errors": ["bad"]}, {"line": 7, "errors": ["bad"]}],
+        "errors_truncated": True,
+    }
@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.background import BackgroundTask
+
+from src.middleware import AccessLogMiddleware, HostAndCORSMiddleware
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"{i}\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(AccessLogMiddleware)
+    app.add_middleware(
+        HostAndCORSMiddleware,
+        allowed_hosts=["testserver", "*.bookly.test"],
+        allow_origins=["https://app.bookly.test"],
+        allow_methods=["GET"],
+        allow_headers=["*"],
+        allow_credentials=True,
+    )
+    return TestClient(app)
+
+
+def test_untrusted_host_is_rejected():
+    client = make_client()
+
+    assert client.get("/stream").status_code == 200
+    assert client.get("/stream", headers={"host": "api.bookly.test"}).status_code == 200
+    assert client.get("/stream", headers={"host": "evil.example"}).status_code == 400
+
+
+def test_cors_headers_and_streamed_body():
+    client = make_client()
+
+    response = client.get("/stream", headers={"origin": "https://app.bookly.test", "x-request-id": "abc"})
+
+    assert response.text == "0\n1\n2\n"
+    assert response.headers["access-control-allow-origin"] == "https://app.bookly.test"
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert response.headers["x-request-id"] == "abc"
+
+    other = client.get("/stream", headers={"origin": "https://elsewhere.test"})
+    assert "access-control-allow-origin" not in other.headers
+
+
+def test_preflight():
+    client = make_client()
+    headers = {"origin": "https://app.bookly.test", "access-control-request-method": "GET"}
+
+    allowed = client.options("/stream", headers=headers)
+    assert allowed.status_code == 200
+    assert allowed.headers["access-control-allow-origin"] == "https://app.bookly.test"
+    assert client.options("/stream", headers={**headers, "access-control-request-method": "DELETE"}).status_code == 400
+
+    rejected = client.options("/stream", headers={**headers, "origin": "https://elsewhere.test"})
+    assert rejected.status_code == 400
+    assert "access-control-allow-origin" not in rejected.headers
+
+
+def test_wildcard_origin_never_gets_credentials():
+    app = FastAPI()
+
+    @app.get("/")
+    async def index():
+        return PlainTextResponse("ok")
+
+    app.add_middleware(
+        HostAndCORSMiddleware,
+        allowed_hosts=["*"],
+        allow_origins=["*"],
+        allow_methods=["GET"],
+        allow_headers=["*"],
+        allow_credentials=True,
+    )
+    client = TestClient(app)
+    origin = "https://evil.example"
+
+    simple = client.get("/", headers={"origin": origin, "cookie": "session=1"})
+    assert simple.headers["access-control-allow-origin"] == "*"
+    assert "access-control-allow-credentials" not in simple.headers
+
+    preflight = client.options("/", headers={"origin": origin, "access-control-request-method": "GET"})
+    assert preflight.status_code == 200
+    assert preflight.headers["access-control-allow-origin"] == "*"
+    assert "access-control-allow-credentials" not in preflight.headers
+
+
+def test_failing_background_task_is_counted_once(monkeypatch):
+    finished = []
+    monkeypatch.setattr(
+        "src.middleware.HTTP_REQUEST_DURATION",
+        SimpleNamespace(labels=lambda method, route, status: SimpleNamespace(observe=lambda _: finished.append(status))),
+    )
+
+    def fail():
+        raise RuntimeError("boom")
+
+    app = FastAPI()
+
+    @app.get("/")
+    async def index():
+        return PlainTextResponse("ok", background=BackgroundTask(fail))
+
+    app.add_middleware(AccessLogMiddleware)
+
+    with pytest.raises(RuntimeError):
+        TestClient(app).get("/")
+
+    assert finished == ["200"]
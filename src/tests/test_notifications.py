@@ -0,0 +1,30 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+from src import notifications
+from src.notifications import NotificationService
+
+
+def test_repeated_idempotency_key_is_queued_once(monkeypatch):
+    claimed = set()
+
+    async def set_nx(key, value, nx, ex):
+        if key in claimed:
+            return None
+        claimed.add(key)
+        return True
+
+    redis = AsyncMock()
+    redis.set.side_effect = set_nx
+    queue_email = AsyncMock()
+    monkeypatch.setattr(notifications, "redis_client", redis)
+    monkeypatch.setattr(notifications, "queue_email", queue_email)
+
+    service = NotificationService()
+    send = lambda: service.send_email(
+        "password_reset", ["a@example.com"], {"link": "http://example.com/reset"}, idempotency_key="a@example.com"
+    )
+
+    assert asyncio.run(send()) is True
+    assert asyncio.run(send()) is False
+    queue_email.assert_awaited_once_with(["a@example.com"], "password_reset", {"link": "http://example.com/reset"}, None)
@@ -0,0 +1,37 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from src.db.pagination import decode_cursor, encode_cursor
+from src.errors import InvalidCursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 8, 20, 20, 31, 59, 652694)
+    uid = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, uid)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, datetime.fromisoformat, uuid.UUID) == (created_at, uid)
+
+
+def test_cursor_from_another_listing_is_rejected():
+    cursor = encode_cursor(3.5, uuid.uuid4())
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, float, int, uuid.UUID)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor", datetime.fromisoformat, uuid.UUID)
+
+
+def test_tampered_cursor_values_are_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(5, 7), float, uuid.UUID)
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(5, [1]), float, uuid.UUID)
@@ -0,0 +1,36 @@
+import logging
+from types import SimpleNamespace
+
+from src.db import profiling
+from src.db.profiling import capture_queries, profile_queries, warn_if_suspicious
+
+
+def _execute(statement, rowcount=1):
+    context = SimpleNamespace()
+    cursor = SimpleNamespace(rowcount=rowcount)
+    profiling._before_cursor_execute(None, cursor, statement, {}, context, False)
+    profiling._after_cursor_execute(None, cursor, statement, {}, context, False)
+
+
+def test_statements_are_counted_only_inside_a_profile():
+    _execute("SELECT 1")
+
+    with profile_queries() as stats:
+        _execute("SELECT books.uid FROM books", rowcount=20)
+        _execute("SELECT reviews.uid FROM reviews WHERE reviews.book_uid = $1", rowcount=-1)
+
+    assert stats.queries == 2
+    assert stats.rows == 20
+    assert stats.server_timing().startswith("db;dur=")
+
+
+def test_repeated_statement_is_reported_as_n_plus_one(caplog):
+    with capture_queries() as stats:
+        for _ in range(3):
+            _execute("SELECT users.uid FROM users WHERE users.uid = $1")
+
+    with caplog.at_level(logging.WARNING, logger="bookly.sql"):
+        warn_if_suspicious(stats, "GET /api/v1/books/")
+
+    assert stats.repeated(3) == [("SELECT users.uid FROM users WHERE users.uid = $1", 3)]
+    assert "possible N+1" in caplog.text
@@ -0,0 +1,105 @@
+"""Per-endpoint query budgets, checked against a real Postgres.
+
+Each test replays the service calls its endpoint makes on a cache miss inside
+`query_budget`, which fails on extra statements or on a statement repeated
+per row (N+1). Point TEST_DATABASE_URL at a throwaway database
+(postgresql+asyncpg://...) to run.
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.books.service import BookService
+from src.db.loading import BOOK_WITH_REVIEWS
+from src.db.profiling import instrument_engine
+from src.reviews.service import ReviewService
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set"
+)
+
+BOOKS = 50
+REVIEWS_PER_BOOK = 5
+
+SEED = [
+    """
+    INSERT INTO users (uid, username, email, firstname, lastname, role, is_verified,
+                       password_hash, created_at, updated_at)
+    VALUES (:user, 'reader', 'reader@example.com', 'first', 'last', 'user', true, 'x', now(), now())
+    """,
+    """
+    INSERT INTO books (uid, title, author, publisher, published_date, page_count, language,
+                       user_uid, created_at, updated_at)
+    SELECT CASE WHEN i = 1 THEN :book ELSE gen_random_uuid() END, 'Book ' || i, 'Author', 'Publisher',
+           date '2000-01-01', 100, 'en', :user, now() - i * interval '1 second', now()
+    FROM generate_series(1, :books) AS i
+    """,
+    """
+    INSERT INTO reviews (uid, rating, review_text, user_uid, book_uid, created_at, updated_at)
+    SELECT gen_random_uuid(), i % 5, 'Review ' || i, :user, b.uid, now() - i * interval '1 second', now()
+    FROM books b CROSS JOIN generate_series(1, :reviews) AS i
+    """,
+]
+
+
+def _run(scenario):
+    async def wrapper():
+        engine = create_async_engine(TEST_DATABASE_URL)
+        instrument_engine(engine)
+        ids = {"user": uuid.uuid4(), "book": uuid.uuid4(), "books": BOOKS, "reviews": REVIEWS_PER_BOOK}
+
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+            await conn.run_sync(SQLModel.metadata.create_all)
+            for statement in SEED:
+                await conn.execute(text(statement), ids)
+
+        try:
+            async with AsyncSession(engine) as session:
+                await scenario(session, ids)
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(SQLModel.metadata.drop_all)
+            await engine.dispose()
+
+    asyncio.run(wrapper())
+
+
+def test_book_list_budget(query_budget):
+    async def scenario(session, ids):
+        with query_budget(1):
+            _, cursor = await BookService().get_books(session, limit=20)
+        with query_budget(1):
+            await BookService().get_books(session, limit=20, cursor=cursor, sort="rating")
+
+    _run(scenario)
+
+
+def test_book_detail_budget(query_budget):
+    async def scenario(session, ids):
+        # GET /books/{id}: the updated_at probe, then the book and its reviews
+        with query_budget(3):
+            await BookService().get_book_updated_at(ids["book"], session)
+            book = await BookService().get_book(ids["book"], session, load=BOOK_WITH_REVIEWS)
+        assert len(book.reviews) == REVIEWS_PER_BOOK
+
+    _run(scenario)
+
+
+def test_review_page_budget(query_budget):
+    async def scenario(session, ids):
+        with query_budget(1):
+            reviews, _ = await ReviewService().get_book_reviews(ids["book"], session, limit=20)
+        assert len(reviews) == REVIEWS_PER_BOOK
+        with query_budget(1):
+            await ReviewService().get_user_reviews(ids["user"], session, limit=20, sort="rating")
+
+    _run(scenario)
@@ -0,0 +1,114 @@
+"""EXPLAIN-based regression test for the hot service queries.
+
+Needs a throwaway Postgres: the test creates the tables, seeds them, and drops
+them again. Point TEST_DATABASE_URL at it (postgresql+asyncpg://...) to run.
+"""
+import asyncio
+import json
+import os
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.auth.service import UserService
+from src.books.service import BookService
+from src.db.loading import BOOK_WITH_REVIEWS
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set"
+)
+
+USERS = 5_000
+BOOKS = 50_000
+REVIEWS = 100_000
+
+SEED = [
+    """
+    INSERT INTO users (uid, username, email, firstname, lastname, role, is_verified,
+                       password_hash, created_at, updated_at)
+    SELECT gen_random_uuid(), 'user' || i, 'user' || i || '@example.com', 'first', 'last',
+           'user', true, 'x', now() - i * interval '1 minute', now()
+    FROM generate_series(1, :users) AS i
+    """,
+    """
+    WITH u AS (SELECT uid, row_number() OVER () AS n FROM users)
+    INSERT INTO books (uid, title, author, publisher, published_date, page_count, language,
+                       user_uid, created_at, updated_at)
+    SELECT gen_random_uuid(), 'Book ' || i, 'Author ' || i % 500, 'Publisher', date '2000-01-01',
+           100 + i % 900, 'en', u.uid, now() - i * interval '1 second', now()
+    FROM generate_series(1, :books) AS i JOIN u ON u.n = 1 + i % :users
+    """,
+    """
+    WITH b AS (SELECT uid, row_number() OVER () AS n FROM books),
+         u AS (SELECT uid, row_number() OVER () AS n FROM users)
+    INSERT INTO reviews (uid, rating, review_text, user_uid, book_uid, created_at, updated_at)
+    SELECT gen_random_uuid(), i % 5, 'Review ' || i, u.uid, b.uid,
+           now() - i * interval '1 second', now()
+    FROM generate_series(1, :reviews) AS i
+    JOIN b ON b.n = 1 + i % :books
+    JOIN u ON u.n = 1 + i % :users
+    """,
+    "ANALYZE",
+]
+
+
+def _seq_scans(plan: dict) -> list:
+    found = [plan["Relation Name"]] if plan["Node Type"] == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found += _seq_scans(child)
+    return found
+
+
+async def _collect_plans() -> dict:
+    engine = create_async_engine(TEST_DATABASE_URL)
+    captured = []
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+        for statement in SEED:
+            await conn.execute(text(statement), {"users": USERS, "books": BOOKS, "reviews": REVIEWS})
+
+    try:
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                captured.append((statement, parameters))
+
+        user_service, book_service = UserService(), BookService()
+        async with AsyncSession(engine) as session:
+            user = await user_service.get_user_by_email("user42@example.com", session)
+            await user_service.get_user_by_uid(user.uid, session)
+            _, cursor = await book_service.get_books(session, limit=20)
+            await book_service.get_books(session, limit=20, cursor=cursor)
+            _, cursor = await book_service.get_books(session, limit=20, sort="rating")
+            await book_service.get_books(session, limit=20, cursor=cursor, sort="rating")
+            books = await book_service.get_user_books(user.uid, session)
+            await book_service.get_book(books[0].uid, session, load=BOOK_WITH_REVIEWS)
+
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        plans = {}
+        async with engine.connect() as conn:
+            for statement, parameters in captured:
+                result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+                plan = result.scalar()
+                plans[statement] = json.loads(plan) if isinstance(plan, str) else plan
+        return plans
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+        await engine.dispose()
+
+
+def test_service_queries_use_indexes():
+    plans = asyncio.run(_collect_plans())
+
+    assert plans
+    for statement, plan in plans.items():
+        assert _seq_scans(plan[0]["Plan"]) == [], f"sequential scan in plan for: {statement}"
@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.errors import RateLimitExceeded
+from src.rate_limit import RateLimiter, client_ip, parse_rate
+
+
+class FakeBudget:
+    """Stands in for the Redis GCRA call: a fixed pool of tokens, no refill."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.calls = 0
+
+    async def __call__(self, key, limit, period, cost):
+        self.calls += 1
+        if cost > self.tokens:
+            return False, 30_000
+        self.tokens -= cost
+        return True, 0
+
+
+def test_parse_rate():
+    assert parse_rate("5/minute") == (5, 60)
+    assert parse_rate("") is None
+
+
+def test_high_limits_are_served_from_local_leases(monkeypatch):
+    limiter = RateLimiter()
+    budget = FakeBudget(tokens=100)
+    monkeypatch.setattr(limiter, "_take", budget)
+
+    async def burst():
+        for _ in range(20):
+            await limiter.acquire("ratelimit:test:1.2.3.4", limit=100, period=60)
+
+    asyncio.run(burst())
+
+    assert budget.calls == 2
+
+
+def test_low_limits_are_exact_and_report_retry_after(monkeypatch):
+    limiter = RateLimiter()
+    monkeypatch.setattr(limiter, "_take", FakeBudget(tokens=5))
+
+    async def attempts():
+        for _ in range(5):
+            await limiter.acquire("ratelimit:login:a@example.com", limit=5, period=60)
+        await limiter.acquire("ratelimit:login:a@example.com", limit=5, period=60)
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        asyncio.run(attempts())
+
+    assert exc.value.retry_after == 30
+
+
+def test_client_ip_ignores_spoofed_forwarded_entries(monkeypatch):
+    monkeypatch.setattr("src.rate_limit.Config.RATE_LIMIT_TRUST_FORWARDED", True)
+    request = SimpleNamespace(
+        headers={"x-forwarded-for": "1.1.1.1, 2.2.2.2, 203.0.113.7"},
+        client=SimpleNamespace(host="10.0.0.2"),
+    )
+
+    monkeypatch.setattr("src.rate_limit.Config.RATE_LIMIT_PROXY_HOPS", 1)
+    assert client_ip(request) == "203.0.113.7"
+
+    monkeypatch.setattr("src.rate_limit.Config.RATE_LIMIT_PROXY_HOPS", 2)
+    assert client_ip(request) == "2.2.2.2"
+
+    monkeypatch.setattr("src.rate_limit.Config.RATE_LIMIT_PROXY_HOPS", 5)
+    assert client_ip(request) == "1.1.1.1"
@@ -0,0 +1,106 @@
+"""Rating aggregates against a real Postgres (jsonb_set and the reconcile CTE need one).
+
+Point TEST_DATABASE_URL at a throwaway database (postgresql+asyncpg://...) to run.
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.books.ratings import apply_review, reconcile_ratings
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set"
+)
+
+SEED = [
+    """
+    INSERT INTO users (uid, username, email, firstname, lastname, role, is_verified,
+                       password_hash, created_at, updated_at)
+    VALUES (:user, 'reader', 'reader@example.com', 'first', 'last', 'user', true, 'x', now(), now())
+    """,
+    """
+    INSERT INTO books (uid, title, author, publisher, published_date, page_count, language,
+                       user_uid, created_at, updated_at)
+    SELECT uid, 'Book', 'Author', 'Publisher', date '2000-01-01', 100, 'en', :user, now(), now()
+    FROM unnest(ARRAY[:first, :second]::uuid[]) AS uid
+    """,
+]
+
+BOOK = "SELECT review_count, rating_sum, rating_histogram FROM books WHERE uid = :uid"
+
+
+def _run(scenario):
+    async def wrapper():
+        engine = create_async_engine(TEST_DATABASE_URL)
+        ids = {"user": uuid.uuid4(), "first": uuid.uuid4(), "second": uuid.uuid4()}
+
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+            await conn.run_sync(SQLModel.metadata.create_all)
+            for statement in SEED:
+                await conn.execute(text(statement), ids)
+
+        try:
+            factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+            return await scenario(factory, ids)
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(SQLModel.metadata.drop_all)
+            await engine.dispose()
+
+    return asyncio.run(wrapper())
+
+
+def test_apply_review_updates_aggregates():
+    async def scenario(factory, ids):
+        async with factory() as session:
+            for rating in (4, 4, 2):
+                assert await apply_review(ids["first"], rating, session)
+            assert not await apply_review(uuid.uuid4(), 3, session)
+            await session.commit()
+
+            return (await session.execute(text(BOOK), {"uid": ids["first"]})).one()
+
+    assert tuple(_run(scenario)) == (3, 10, {"4": 2, "2": 1})
+
+
+def test_reconcile_rebuilds_drifted_aggregates():
+    async def scenario(factory, ids):
+        async with factory() as session:
+            await session.execute(
+                text(
+                    """
+                    INSERT INTO reviews (uid, rating, review_text, user_uid, book_uid, created_at, updated_at)
+                    VALUES (gen_random_uuid(), 3, 'ok', :user, :first, now(), now()),
+                           (gen_random_uuid(), 1, 'meh', :user, :first, now(), now())
+                    """
+                ),
+                ids,
+            )
+            # drift: aggregates that match none of the reviews
+            await session.execute(text("UPDATE books SET review_count = 7, rating_sum = 20, rating_histogram = '{\"4\": 7}'"))
+            await session.commit()
+
+        batches = []
+        rebuilt = await reconcile_ratings(factory, batch_size=1, on_batch=batches.append)
+
+        async with factory() as session:
+            first = (await session.execute(text(BOOK), {"uid": ids["first"]})).one()
+            second = (await session.execute(text(BOOK), {"uid": ids["second"]})).one()
+        return rebuilt, batches, first, second
+
+    rebuilt, batches, first, second = _run(scenario)
+
+    assert rebuilt == 2
+    assert len(batches) == 2
+    assert tuple(first) == (2, 4, {"3": 1, "1": 1})
+    assert tuple(second) == (0, 0, {})
@@ -0,0 +1,50 @@
+import uuid
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.books.service import BookService
+from src.db.pagination import decode_cursor, encode_cursor
+from src.errors import InvalidCursor
+
+
+def _compile(statement):
+    return statement.compile(dialect=postgresql.dialect())
+
+
+def test_search_statement_applies_filters():
+    compiled = _compile(BookService()._search_statement(
+        "dune herbert", language="en", published_from=date(1960, 1, 1), max_pages=500,
+    ))
+    sql = str(compiled)
+
+    assert "websearch_to_tsquery('simple'::regconfig" in sql
+    # The separator is inlined so the expression matches ix_books_title_author_trgm,
+    # "(title || ' ' || author)". || is left-associative, so Postgres parses the index
+    # expression as (title || ' ') || author: the same tree SQLAlchemy renders here.
+    assert "(books.title || ' ') || books.author" in sql
+    assert "books.language =" in sql
+    assert "books.published_date >=" in sql
+    assert "books.page_count <=" in sql
+    assert "books.published_date <=" not in sql
+    assert {"en", date(1960, 1, 1), 500} <= set(compiled.params.values())
+
+
+def test_search_cursor_continues_after_score_and_uid():
+    uid = uuid.uuid4()
+    score = 0.1 + 0.2  # not exactly representable; the cursor must keep every digit
+
+    cursor = encode_cursor(score, uid)
+    assert decode_cursor(cursor, float, uuid.UUID) == (score, uid)
+
+    compiled = _compile(BookService()._search_statement("dune", cursor))
+    assert score in compiled.params.values()
+    assert uid in compiled.params.values()
+
+
+def test_search_rejects_a_cursor_from_another_listing():
+    cursor = encode_cursor("2025-08-20T20:31:59", uuid.uuid4())
+
+    with pytest.raises(InvalidCursor):
+        BookService()._search_statement("dune", cursor)
@@ -0,0 +1,45 @@
+import json
+import uuid
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from src import serialization
+from src.config import Config
+
+
+def _book(**overrides):
+    now = datetime(2025, 8, 20, 20, 31, 59, 123456)
+    fields = dict(
+        uid=uuid.uuid4(), title="Dune", author="Frank Herbert", publisher="Chilton",
+        published_date=date(1965, 8, 1), page_count=412, language="en",
+        review_count=2, rating_sum=7, rating_histogram={"3": 1, "4": 1},
+        created_at=now, updated_at=now,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def test_fast_path_matches_pydantic_output(monkeypatch):
+    book = _book()
+
+    monkeypatch.setattr(Config, "FAST_SERIALIZATION", False)
+    slow = json.loads(serialization.dump_book(book, include_reviews=False))
+    monkeypatch.setattr(Config, "FAST_SERIALIZATION", True)
+    fast = json.loads(serialization.dump_book(book, include_reviews=False))
+
+    assert fast == slow
+    assert fast["average_rating"] == 3.5
+
+
+def test_sparse_fieldsets_match_between_paths(monkeypatch):
+    rows = [_book(), _book(review_count=0, rating_sum=0, rating_histogram={})]
+    fields = ("uid", "title", "average_rating")
+
+    monkeypatch.setattr(Config, "FAST_SERIALIZATION", False)
+    slow = json.loads(serialization.dump_books_page(rows, "abc", fields))
+    monkeypatch.setattr(Config, "FAST_SERIALIZATION", True)
+    fast = json.loads(serialization.dump_books_page(rows, "abc", fields))
+
+    assert fast == slow
+    assert list(fast["items"][0]) == list(fields)
+    assert fast["items"][1]["average_rating"] is None
@@ -0,0 +1,81 @@
+import smtplib
+import socket
+
+import pytest
+
+aiosmtpd = pytest.importorskip("aiosmtpd.controller")
+
+from src.smtp import RateLimiter, SMTPConnectionPool, build_message, send_batch
+
+
+class Sink:
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("missing@"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.sessions.add(id(session))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_sink():
+    sink = Sink()
+    controller = aiosmtpd.Controller(sink, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield sink, controller.port
+    controller.stop()
+
+
+def test_batch_reuses_one_connection(smtp_sink):
+    sink, port = smtp_sink
+    pool = SMTPConnectionPool("127.0.0.1", port, size=1)
+    batch = [
+        {"recipients": [f"user{i}@example.com"], "subject": "Verify your email", "body": "<p>hi</p>"}
+        for i in range(5)
+    ]
+
+    assert send_batch(batch, pool, RateLimiter(0)) == []
+    pool.close()
+
+    assert len(sink.messages) == 5
+    assert len(sink.sessions) == 1
+    assert pool.connects == 1
+
+
+def test_connection_is_replaced_after_max_messages(smtp_sink):
+    sink, port = smtp_sink
+    pool = SMTPConnectionPool("127.0.0.1", port, size=1, max_messages=2)
+
+    for i in range(4):
+        pool.send(build_message([f"user{i}@example.com"], "Hello", "<p>hi</p>"))
+    pool.close()
+
+    assert len(sink.messages) == 4
+    assert pool.connects == 2
+
+
+def test_refused_recipient_keeps_the_connection(smtp_sink):
+    sink, port = smtp_sink
+    pool = SMTPConnectionPool("127.0.0.1", port, size=1)
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.send(build_message(["missing@example.com"], "Hello", "<p>hi</p>"))
+    pool.send(build_message(["user@example.com"], "Hello", "<p>hi</p>"))
+    pool.close()
+
+    assert len(sink.messages) == 1
+    assert pool.connects == 1